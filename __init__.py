@@ -24,15 +24,6 @@ from .const import (
     LOVELACE_CARD_URL,
     LOVELACE_VISION_CARD_URL,
 )
-from .env_backup import restore_env_from_backup, backup_env_files
-from .env_utils import (
-    migrate_env_files,
-    read_env_file,
-    write_env_file,
-    env_file_exists,
-    ACCOUNT_ENV,
-    SECRETS_ENV,
-)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -65,6 +56,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Richte die iona-ha Integration ein (Config Entry)."""
     hass.data.setdefault(DOMAIN, {})
 
+    # Erst hier importieren – hält den Import der Integration schlank
+    from .env_backup import restore_env_from_backup
+    from .env_utils import migrate_env_files
+
     # 1. Migration: accound.env → account.env (Tippfehler v1.x)
     await hass.async_add_executor_job(migrate_env_files)
 
@@ -88,7 +83,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     # 5. Stündliches Backup der env-Dateien
     async def _periodic_backup(_now=None):
-        await hass.async_add_executor_job(backup_env_files, hass)
+        from .env_backup import async_backup_env_files
+
+        await async_backup_env_files(hass)
 
     entry.async_on_unload(
         async_track_time_interval(hass, _periodic_backup, timedelta(hours=1))
@@ -123,12 +120,22 @@ async def _sync_credentials(
     von älterer Version), werden diese in den ConfigEntry übernommen und
     anschließend aus der env-Datei entfernt.
     """
+    from .env_utils import (
+        read_all_snapshot,
+        write_env_file,
+        ACCOUNT_ENV,
+        SECRETS_ENV,
+    )
+
+    # Beide env-Dateien in einem einzigen Executor-Job lesen
+    snapshot = await hass.async_add_executor_job(read_all_snapshot)
+
     # --- secrets-n2g.env ---
-    secrets_exists = await hass.async_add_executor_job(env_file_exists, SECRETS_ENV)
+    secrets_exists = snapshot["secrets_exists"]
     entry_box = entry.data.get(CONF_IONA_BOX, "")
 
     if secrets_exists:
-        secrets_data = await hass.async_add_executor_job(read_env_file, SECRETS_ENV)
+        secrets_data = snapshot["secrets"]
 
         # Migration: Credentials aus alter env-Datei in ConfigEntry übernehmen
         env_user = secrets_data.get(CONF_USERNAME, "")
@@ -187,10 +194,10 @@ async def _sync_credentials(
         _LOGGER.info("IONA_BOX aus ConfigEntry wiederhergestellt")
 
     # --- account.env ---
-    account_exists = await hass.async_add_executor_job(env_file_exists, ACCOUNT_ENV)
+    account_exists = snapshot["account_exists"]
     if account_exists and not restored:
         # env war schon da → ConfigEntry aktualisieren falls abweichend
-        account_data = await hass.async_add_executor_job(read_env_file, ACCOUNT_ENV)
+        account_data = snapshot["account"]
         env_vision = account_data.get(CONF_VISION_TARIFF, "False").lower() == "true"
         env_tools = account_data.get(CONF_VISION_TOOLS, "False").lower() == "true"
         entry_vision = entry.data.get(CONF_VISION_TARIFF, False)
@@ -274,7 +281,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             await manager.async_stop()
 
         # Letztes Backup vor dem Entladen
-        await hass.async_add_executor_job(backup_env_files, hass)
+        from .env_backup import async_backup_env_files
+
+        await async_backup_env_files(hass)
 
         _LOGGER.info("iona-ha Integration entladen")
 
@@ -7,9 +7,15 @@ Ergebnis in spotpreise_brutto_db.json.
 
 import json
 import logging
-import os
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson kommt mit HA Core; sonst Fallback auf json
+    orjson = None
+
+from ..env_utils import atomic_write
+
 _LOGGER = logging.getLogger(__name__)
 
 SCRIPT_DIR = Path(__file__).parent
@@ -18,28 +24,46 @@ SPOTPREISE_FILE = DATA_DIR / "spotpreise_db.json"
 TARIFF_FILE = DATA_DIR / "tariff_db.json"
 OUTPUT_FILE = DATA_DIR / "spotpreise_brutto_db.json"
 
+# Festkomma-Skala der Spotpreise (10^-6 €/MWh)
+_SKALA = 1_000_000
+
+# Erst nach einer Berechnung in diesem Prozess darf _is_up_to_date überspringen
+_berechnet_seit_start = False
+
+# Variable Drittkosten-Komponenten aus thirdPartyCost (ct/kWh brutto)
+_COST_KEYS = (
+    "gridWorkingPrice",
+    "gridFedInRegulation",
+    "concessionLevy",
+    "energyTax",
+    "offshoreLevy",
+    "powerHeatCouplingLevy",
+    "renewableEnergyLevy",
+    "defeatableLoadLevy",
+)
+
 
 def _load_json(filepath: Path) -> dict:
-    with open(filepath, "r", encoding="utf-8") as fh:
-        return json.load(fh)
+    with open(filepath, "rb") as fh:
+        raw = fh.read()
+    return orjson.loads(raw) if orjson else json.loads(raw)
 
 
 def _save_json(data: dict, filepath: Path) -> None:
-    """Speichert Preise mit 2 Dezimalstellen – atomar (tmp + rename).
+    """Speichert die Preise kompakt – atomar (tmp + fsync + rename).
 
+    Die Preise sind bereits in _convert_spot_to_brutto auf 2 Dezimalstellen
+    gerundet, daher wird das dict ohne Kopie direkt serialisiert.
     sensor.py liest die Datei alle 5 s; direktes Schreiben könnte
     einen Lesezugriff auf halb geschriebenes JSON treffen.
     """
-    out = {"_default": {}}
-    for key, entry in data["_default"].items():
-        out["_default"][key] = {
-            "timestamp": entry["timestamp"],
-            "price": round(entry["price"], 2),
-        }
-    tmp_path = filepath.with_suffix(filepath.suffix + ".tmp")
-    with open(tmp_path, "w", encoding="utf-8") as fh:
-        json.dump(out, fh, ensure_ascii=False)
-    os.replace(tmp_path, filepath)
+    if orjson:
+        payload = orjson.dumps(data)
+    else:
+        payload = json.dumps(
+            data, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+    atomic_write(filepath, payload)
 
 
 def _get_variable_costs(tariff: dict) -> float:
@@ -55,21 +79,7 @@ def _get_variable_costs(tariff: dict) -> float:
         costs += tariff["workingPrice"].get("gross", 0.0)
 
     tpc = tariff.get("thirdPartyCost", {}) or {}
-
-    cost_keys = [
-        "gridWorkingPrice",
-        "gridFedInRegulation",
-        "concessionLevy",
-        "energyTax",
-        "offshoreLevy",
-        "powerHeatCouplingLevy",
-        "renewableEnergyLevy",
-        "defeatableLoadLevy",
-    ]
-    for key in cost_keys:
-        component = tpc.get(key)
-        if component:
-            costs += component.get("gross", 0.0)
+    costs += sum((tpc.get(key) or {}).get("gross", 0.0) for key in _COST_KEYS)
 
     return costs
 
@@ -77,29 +87,63 @@ def _get_variable_costs(tariff: dict) -> float:
 def _convert_spot_to_brutto(
     spotpreise: dict, zusatzkosten_ct_kwh: float, mwst_faktor: float = 1.19
 ) -> dict:
-    """Konvertiert Spotpreise (€/MWh netto) zu Brutto-Endkundenpreisen (€/MWh)."""
-    brutto = {"_default": {}}
-    zusatzkosten_eur_mwh = zusatzkosten_ct_kwh * 10
+    """Konvertiert Spotpreise (€/MWh netto) zu Brutto-Endkundenpreisen (€/MWh).
 
+    Gerechnet wird ganzzahlig: Preise in Mikro-€/MWh (10^-6, weit unter
+    der Genauigkeit der API), MwSt. in Prozent, Zusatzkosten einmal
+    vorab skaliert. Gerundet wird nur das Ergebnis – kaufmännisch auf
+    2 Stellen, ohne Float-Artefakte und ohne Banker's Rounding bei ,5.
+    """
+    mwst_prozent = round(mwst_faktor * 100)
+    # Zusatzkosten ct/kWh → €/MWh (×10), skaliert wie Preis × MwSt-Prozent
+    zusatz = round(zusatzkosten_ct_kwh * 10 * _SKALA * 100)
+    halb = _SKALA // 2
+    result = {}
     for key, entry in spotpreise.get("_default", {}).items():
-        spot_brutto = entry["price"] * mwst_faktor
-        brutto_total = round(spot_brutto + zusatzkosten_eur_mwh, 2)
-        brutto["_default"][key] = {
+        wert = round(entry["price"] * _SKALA) * mwst_prozent + zusatz
+        # 10^-8 €/MWh → 0,01 €/MWh, kaufmännisch gerundet (auch negativ)
+        cent = (abs(wert) + halb) // _SKALA
+        result[key] = {
             "timestamp": entry["timestamp"],
-            "price": brutto_total,
+            "price": (cent if wert >= 0 else -cent) / 100,
         }
+    return {"_default": result}
+
 
-    return brutto
+def _is_up_to_date() -> bool:
+    """True, wenn die Ausgabe echt neuer ist als Spot- und Tarifdaten.
+
+    Die Bruttopreise hängen nur von diesen beiden Dateien ab; solange
+    keine davon neu geschrieben wurde, liefert die Neuberechnung
+    dasselbe Ergebnis. Gleiche mtime zählt als veraltet (grobe
+    Zeitstempel, z. B. FAT oder Netzlaufwerke, können beide Schreib-
+    vorgänge in denselben Tick legen). Der erste Lauf nach dem Start
+    rechnet immer neu, damit eine geänderte Formel (Update) nicht an
+    alten Daten hängen bleibt.
+    """
+    if not _berechnet_seit_start:
+        return False
+    try:
+        out_mtime = OUTPUT_FILE.stat().st_mtime_ns
+        return out_mtime > max(
+            SPOTPREISE_FILE.stat().st_mtime_ns, TARIFF_FILE.stat().st_mtime_ns
+        )
+    except OSError:
+        return False
 
 
 def run() -> bool:
     """Bruttopreise berechnen und speichern. Gibt True bei Erfolg zurück."""
+    global _berechnet_seit_start
     if not SPOTPREISE_FILE.exists():
         _LOGGER.warning("calc_preise: spotpreise_db.json nicht vorhanden")
         return False
     if not TARIFF_FILE.exists():
         _LOGGER.warning("calc_preise: tariff_db.json nicht vorhanden")
         return False
+    if _is_up_to_date():
+        _LOGGER.debug("calc_preise: Bruttopreise aktuell – überspringe")
+        return True
 
     try:
         spotpreise = _load_json(SPOTPREISE_FILE)
@@ -112,6 +156,7 @@ def run() -> bool:
     brutto = _convert_spot_to_brutto(spotpreise, zusatzkosten)
 
     _save_json(brutto, OUTPUT_FILE)
+    _berechnet_seit_start = True
     _LOGGER.info(
         "Bruttopreise: %d Einträge berechnet (Zusatzkosten: %.2f ct/kWh)",
         len(brutto["_default"]),
@@ -119,7 +164,3 @@ def run() -> bool:
     )
     return True
 
-
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    raise SystemExit(0 if run() else 1)
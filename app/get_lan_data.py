@@ -5,61 +5,81 @@ liest Momentanleistung (W), Gesamtverbrauch (kWh) und
 Gesamteinspeisung (kWh) aus und schreibt in meter_db.json.
 """
 
-import os
 import ast
 import json
 import logging
 from datetime import datetime
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
-import requests
-from tinydb import TinyDB, Query
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+try:
+    import orjson
+except ImportError:  # orjson kommt mit HA Core; sonst Fallback auf json
+    orjson = None
+
+from ..env_utils import read_env_cached
+from . import meter_store
 
 _LOGGER = logging.getLogger(__name__)
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ENV_DIR = os.path.join(BASE_DIR, "env")
-DATA_DIR = os.path.join(BASE_DIR, "data")
-DB_PATH = os.path.join(DATA_DIR, "meter_db.json")
+_JSON_LOADS = orjson.loads if orjson else json.loads
 
+# Zeitzone Europa/Berlin (MEZ/MESZ automatisch) – einmalig laden
+_TZ_LOCAL = ZoneInfo("Europe/Berlin")
 
-def _read_env(filename: str) -> dict:
-    env: dict[str, str] = {}
-    filepath = os.path.join(ENV_DIR, filename)
-    try:
-        with open(filepath, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if line and "=" in line and not line.startswith("#"):
-                    k, v = line.split("=", 1)
-                    env[k.strip()] = v.strip().strip('"')
-    except FileNotFoundError:
-        pass
-    return env
-
-
-def _fetch_data(url: str, access_token: str) -> dict | None:
-    """Verbrauchsdaten von der iONA Box abrufen."""
-    headers = {
+# Eigener Connect-Timeout statt separatem TCP-Vorab-Check: eine nicht
+# erreichbare Box scheitert nach 3 s am Verbindungsaufbau, ohne dass ein
+# zusätzlicher Socket (oder Executor-Thread) benötigt wird.
+_LAN_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=3)
+
+
+@lru_cache(maxsize=1)
+def _headers(access_token: str) -> dict:
+    """Request-Header zum Token (nur bei Token-Wechsel neu gebaut).
+
+    Das dict wird zwischen Abrufen geteilt und darf nicht verändert werden.
+    """
+    return {
         "Authorization": f'N2G-LAN-USER token="{access_token}"',
         "accept": "application/json",
     }
+
+
+async def _fetch_data(
+    session: aiohttp.ClientSession, url: str, access_token: str
+) -> dict | None:
+    """Verbrauchsdaten von der iONA Box abrufen."""
     try:
-        response = requests.get(url, headers=headers, timeout=5)
-        if response.status_code == 401:
-            _LOGGER.warning("LAN-Daten: 401 – Token nicht gültig")
+        async with session.get(
+            url, headers=_headers(access_token), timeout=_LAN_TIMEOUT
+        ) as response:
+            if response.status == 401:
+                _LOGGER.warning("LAN-Daten: 401 – Token nicht gültig")
+                return None
+            if response.status == 200:
+                return await response.json(content_type=None, loads=_JSON_LOADS)
+            _LOGGER.warning("LAN-Daten: API-Fehler %d", response.status)
             return None
-        if response.status_code == 200:
-            return response.json()
-        _LOGGER.warning("LAN-Daten: API-Fehler %d", response.status_code)
-        return None
-    except requests.RequestException as err:
+    except (aiohttp.ClientError, TimeoutError, ValueError) as err:
         # Nur warning: läuft im 5-s-Takt; dauerhafte Ausfälle meldet der
         # DataManager per Notification (Edge-Trigger)
         _LOGGER.warning("LAN-Daten: Verbindungsfehler – %s", err)
         return None
 
 
+@lru_cache(maxsize=16)
+def _epoch_to_iso(epoch: int) -> str:
+    """Epoch-Sekunden der Box als ISO-String (lokale Zeit).
+
+    Leistung, Import und Export tragen meist denselben Zeitstempel –
+    der Cache spart dann zwei von drei Umrechnungen pro Abruf.
+    """
+    return datetime.fromtimestamp(epoch, tz=_TZ_LOCAL).isoformat()
+
+
 def _is_newer(new_ts: str | None, old_ts: str | None) -> bool:
     """True, wenn new_ts neuer als old_ts ist.
 
@@ -76,6 +96,19 @@ def _is_newer(new_ts: str | None, old_ts: str | None) -> bool:
         return new_ts > old_ts
 
 
+def _parse_lan_token(data_raw: str) -> dict:
+    """DATA aus LanToken.env parsen.
+
+    Seit get_lan_token JSON schreibt, reicht json.loads. Ältere Dateien
+    enthalten noch str(dict) – dafür bleibt ast.literal_eval als Fallback,
+    bis der nächste LAN-Token-Refresh die Datei neu geschrieben hat.
+    """
+    try:
+        return json.loads(data_raw)
+    except ValueError:
+        return ast.literal_eval(data_raw)
+
+
 def _parse_power(raw_value: int | None) -> int | None:
     """Momentanleistung korrigieren (Überlauf-Werte)."""
     if raw_value is None or raw_value == 0:
@@ -85,37 +118,105 @@ def _parse_power(raw_value: int | None) -> int | None:
     return raw_value
 
 
-def run() -> bool:
-    """Hauptfunktion: Daten von der iONA Box lesen und in DB schreiben."""
+def _update_db(
+    momentanleistung: int | None,
+    momentanleistung_ts: str | None,
+    gesamtverbrauch: float | None,
+    gesamtverbrauch_ts: str | None,
+    gesamteinspeisung: float | None,
+    gesamteinspeisung_ts: str | None,
+) -> bool:
+    """Messwerte in meter_db.json schreiben (Executor)."""
+    entry = meter_store.get_meter()
+    if entry is None:
+        insert_data = {"source": "LAN"}
+        if gesamtverbrauch is not None:
+            insert_data.update(
+                Gesamtverbrauch=gesamtverbrauch,
+                Gesamtverbrauch_unit="kWh",
+                Gesamtverbrauch_timestamp=gesamtverbrauch_ts,
+            )
+        if momentanleistung is not None:
+            insert_data.update(
+                Momentanleistung=momentanleistung,
+                Momentanleistung_unit="W",
+                Momentanleistung_timestamp=momentanleistung_ts,
+            )
+        if gesamteinspeisung is not None:
+            insert_data.update(
+                Gesamteinspeisung=gesamteinspeisung,
+                Gesamteinspeisung_unit="kWh",
+                Gesamteinspeisung_timestamp=gesamteinspeisung_ts,
+            )
+        meter_store.update_meter(**insert_data)
+        _LOGGER.info("LAN-Daten: Neuer Zähler-Eintrag erstellt")
+        return True
+
+    updates = {}
+
+    if gesamtverbrauch is not None:
+        if _is_newer(gesamtverbrauch_ts, entry.get("Gesamtverbrauch_timestamp")):
+            updates["Gesamtverbrauch"] = gesamtverbrauch
+            updates["Gesamtverbrauch_timestamp"] = gesamtverbrauch_ts
+
+    if gesamteinspeisung is not None:
+        old_val = entry.get("Gesamteinspeisung")
+        if _is_newer(gesamteinspeisung_ts, entry.get("Gesamteinspeisung_timestamp")):
+            if not (old_val and old_val > 0 and gesamteinspeisung == 0):
+                updates["Gesamteinspeisung"] = gesamteinspeisung
+                updates["Gesamteinspeisung_timestamp"] = gesamteinspeisung_ts
+
+    if momentanleistung is not None:
+        if _is_newer(momentanleistung_ts, entry.get("Momentanleistung_timestamp")):
+            updates["Momentanleistung"] = momentanleistung
+            updates["Momentanleistung_timestamp"] = momentanleistung_ts
+
+    # Unveränderte Felder filtert meter_store heraus (dann kein Schreibzugriff)
+    if updates:
+        updates["source"] = "LAN"
+        if meter_store.update_meter(**updates) and _LOGGER.isEnabledFor(
+            logging.DEBUG
+        ):
+            _LOGGER.debug(
+                "LAN-Daten: DB aktualisiert (Quelle: LAN) – %s",
+                ", ".join(k for k in updates if not k.endswith("_timestamp")),
+            )
+
+    return True
+
+
+async def run(hass: HomeAssistant, session: aiohttp.ClientSession) -> bool:
+    """Hauptfunktion: Daten von der iONA Box lesen und in DB schreiben.
+
+    HTTP läuft async über die (keep-alive) Session des DataManagers,
+    Datei-I/O im Executor.
+    """
     # Zugangsdaten laden
-    secrets = _read_env("secrets-n2g.env")
+    secrets = await hass.async_add_executor_job(read_env_cached, "secrets-n2g.env")
     iona_box = secrets.get("IONA_BOX")
     if not iona_box:
         _LOGGER.error("IONA_BOX nicht in secrets-n2g.env gesetzt")
         return False
 
-    lan_env = _read_env("LanToken.env")
+    lan_env = await hass.async_add_executor_job(read_env_cached, "LanToken.env")
     data_raw = lan_env.get("DATA")
     if not data_raw:
         _LOGGER.debug("LAN-Token (DATA) nicht vorhanden – überspringe")
         return False
 
     try:
-        data_dict = ast.literal_eval(data_raw)
+        data_dict = _parse_lan_token(data_raw)
         access_token = data_dict["user_lan_token"]
-    except (ValueError, KeyError, TypeError) as err:
+    except (ValueError, SyntaxError, KeyError, TypeError) as err:
         _LOGGER.error("LAN-Token Parsing fehlgeschlagen: %s", err)
         return False
 
-    # Daten abrufen (Erreichbarkeit deckt der Request-Timeout selbst ab)
+    # Daten abrufen (Erreichbarkeit deckt der Connect-Timeout selbst ab)
     url = f"http://{iona_box}/meter/now"
-    data = _fetch_data(url, access_token)
+    data = await _fetch_data(session, url, access_token)
     if data is None:
         return False
 
-    # Zeitzone Europa/Berlin (MEZ/MESZ automatisch)
-    tz_local = ZoneInfo("Europe/Berlin")
-
     # Momentanleistung
     try:
         power_raw = data["elec"]["power"]["now"]["value"]
@@ -125,11 +226,7 @@ def run() -> bool:
         power_ts_epoch = None
 
     momentanleistung = _parse_power(power_raw)
-    momentanleistung_ts = (
-        datetime.fromtimestamp(power_ts_epoch, tz=tz_local).isoformat()
-        if power_ts_epoch
-        else None
-    )
+    momentanleistung_ts = _epoch_to_iso(power_ts_epoch) if power_ts_epoch else None
 
     # Gesamtverbrauch (Import)
     try:
@@ -140,11 +237,7 @@ def run() -> bool:
         import_ts_epoch = None
 
     gesamtverbrauch = import_raw / 1000 if import_raw not in (None, 0) else None
-    gesamtverbrauch_ts = (
-        datetime.fromtimestamp(import_ts_epoch, tz=tz_local).isoformat()
-        if import_ts_epoch
-        else None
-    )
+    gesamtverbrauch_ts = _epoch_to_iso(import_ts_epoch) if import_ts_epoch else None
 
     # Gesamteinspeisung (Export)
     try:
@@ -155,80 +248,15 @@ def run() -> bool:
         export_ts_epoch = None
 
     gesamteinspeisung = export_raw / 1000 if export_raw not in (None, 0) else None
-    gesamteinspeisung_ts = (
-        datetime.fromtimestamp(export_ts_epoch, tz=tz_local).isoformat()
-        if export_ts_epoch
-        else None
+    gesamteinspeisung_ts = _epoch_to_iso(export_ts_epoch) if export_ts_epoch else None
+
+    return await hass.async_add_executor_job(
+        _update_db,
+        momentanleistung,
+        momentanleistung_ts,
+        gesamtverbrauch,
+        gesamtverbrauch_ts,
+        gesamteinspeisung,
+        gesamteinspeisung_ts,
     )
 
-    # In TinyDB schreiben
-    os.makedirs(DATA_DIR, exist_ok=True)
-    Device = Query()
-
-    if os.path.isfile(DB_PATH):
-        try:
-            with open(DB_PATH, "r", encoding="utf-8") as f:
-                json.load(f)
-        except (json.JSONDecodeError, ValueError):
-            _LOGGER.warning("meter_db.json ist beschädigt – wird neu erstellt")
-            os.remove(DB_PATH)
-
-    with TinyDB(DB_PATH) as db:
-        result = db.search(Device.device_id == "Stromzaehler")
-        if result:
-            entry = result[0]
-            updated = False
-
-            if gesamtverbrauch is not None:
-                if _is_newer(gesamtverbrauch_ts, entry.get("Gesamtverbrauch_timestamp")):
-                    entry["Gesamtverbrauch"] = gesamtverbrauch
-                    entry["Gesamtverbrauch_timestamp"] = gesamtverbrauch_ts
-                    updated = True
-
-            if gesamteinspeisung is not None:
-                old_val = entry.get("Gesamteinspeisung")
-                if _is_newer(gesamteinspeisung_ts, entry.get("Gesamteinspeisung_timestamp")):
-                    if not (old_val and old_val > 0 and gesamteinspeisung == 0):
-                        entry["Gesamteinspeisung"] = gesamteinspeisung
-                        entry["Gesamteinspeisung_timestamp"] = gesamteinspeisung_ts
-                        updated = True
-
-            if momentanleistung is not None:
-                if _is_newer(momentanleistung_ts, entry.get("Momentanleistung_timestamp")):
-                    entry["Momentanleistung"] = momentanleistung
-                    entry["Momentanleistung_timestamp"] = momentanleistung_ts
-                    updated = True
-
-            if updated:
-                entry["source"] = "LAN"
-                db.update(entry, Device.device_id == "Stromzaehler")
-                _LOGGER.debug("LAN-Daten: DB aktualisiert (Quelle: LAN)")
-        else:
-            insert_data = {"device_id": "Stromzaehler", "source": "LAN"}
-            if gesamtverbrauch is not None:
-                insert_data.update(
-                    Gesamtverbrauch=gesamtverbrauch,
-                    Gesamtverbrauch_unit="kWh",
-                    Gesamtverbrauch_timestamp=gesamtverbrauch_ts,
-                )
-            if momentanleistung is not None:
-                insert_data.update(
-                    Momentanleistung=momentanleistung,
-                    Momentanleistung_unit="W",
-                    Momentanleistung_timestamp=momentanleistung_ts,
-                )
-            if gesamteinspeisung is not None:
-                insert_data.update(
-                    Gesamteinspeisung=gesamteinspeisung,
-                    Gesamteinspeisung_unit="kWh",
-                    Gesamteinspeisung_timestamp=gesamteinspeisung_ts,
-                )
-            db.insert(insert_data)
-            _LOGGER.info("LAN-Daten: Neuer Zähler-Eintrag erstellt")
-
-    return True
-
-
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    raise SystemExit(0 if run() else 1)
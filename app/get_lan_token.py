@@ -5,8 +5,14 @@ Speichert das Ergebnis in LanToken.env.
 """
 
 import os
+import json
+import asyncio
 import logging
-import requests
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from ..env_utils import atomic_write, read_env_cached
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -16,34 +22,22 @@ ENV_DIR = os.path.join(BASE_DIR, "env")
 LAN_TOKEN_URL = "https://api.n2g-iona.net/v2/lan/token"
 
 
-def _read_env(filename: str) -> dict:
-    env: dict[str, str] = {}
-    filepath = os.path.join(ENV_DIR, filename)
-    try:
-        with open(filepath, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if line and "=" in line and not line.startswith("#"):
-                    k, v = line.split("=", 1)
-                    env[k.strip()] = v.strip().strip('"')
-    except FileNotFoundError:
-        pass
-    return env
-
-
 def _save_token(token_data: dict) -> None:
+    """Speichert Token-Daten in LanToken.env (dict/list-Werte als JSON)."""
     filepath = os.path.join(ENV_DIR, "LanToken.env")
     os.makedirs(ENV_DIR, exist_ok=True)
-    with open(filepath, "w", encoding="utf-8") as fh:
-        for key, value in token_data.items():
-            fh.write(f"{key.upper()}={value}\n")
-    os.chmod(filepath, 0o600)
+    lines = []
+    for key, value in token_data.items():
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        lines.append(f"{key.upper()}={value}\n")
+    atomic_write(filepath, "".join(lines).encode("utf-8"), 0o600)
     _LOGGER.debug("LAN-Token gespeichert in %s", filepath)
 
 
-def run() -> bool:
+async def run(hass: HomeAssistant, session: aiohttp.ClientSession) -> bool:
     """Hole einen neuen LAN-Token. Gibt True bei Erfolg zurück."""
-    web_env = _read_env("WebToken.env")
+    web_env = await hass.async_add_executor_job(read_env_cached, "WebToken.env")
     access_token = web_env.get("ACCESS_TOKEN")
 
     if not access_token:
@@ -53,19 +47,17 @@ def run() -> bool:
     headers = {"authorization": f"Bearer {access_token}"}
 
     try:
-        response = requests.get(LAN_TOKEN_URL, headers=headers, timeout=15)
-        if response.status_code == 401:
-            _LOGGER.warning("LAN-Token: 401 – Web-Token ungültig")
-            return False
-        response.raise_for_status()
-        _save_token(response.json())
-        _LOGGER.info("Neuer LAN-Token erfolgreich gespeichert")
-        return True
-    except requests.RequestException as err:
+        async with asyncio.timeout(15):
+            async with session.get(LAN_TOKEN_URL, headers=headers) as response:
+                if response.status == 401:
+                    _LOGGER.warning("LAN-Token: 401 – Web-Token ungültig")
+                    return False
+                response.raise_for_status()
+                token_data = await response.json(content_type=None)
+    except (aiohttp.ClientError, TimeoutError, ValueError) as err:
         _LOGGER.error("Fehler beim LAN-Token-Abruf: %s", err)
         return False
 
-
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    raise SystemExit(0 if run() else 1)
+    await hass.async_add_executor_job(_save_token, token_data)
+    _LOGGER.info("Neuer LAN-Token erfolgreich gespeichert")
+    return True
@@ -4,37 +4,40 @@ Dient als Fallback, wenn die lokale iONA Box nicht erreichbar ist.
 Schreibt in meter_db.json.
 """
 
-import os
+import asyncio
 import json
 import logging
 from datetime import datetime
+from functools import lru_cache
 
-import requests
-from tinydb import TinyDB, Query
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+try:
+    import orjson
+except ImportError:  # orjson kommt mit HA Core; sonst Fallback auf json
+    orjson = None
+
+from ..env_utils import read_env_cached
+from . import meter_store
 
 _LOGGER = logging.getLogger(__name__)
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ENV_DIR = os.path.join(BASE_DIR, "env")
-DATA_DIR = os.path.join(BASE_DIR, "data")
-DB_PATH = os.path.join(DATA_DIR, "meter_db.json")
+_JSON_LOADS = orjson.loads if orjson else json.loads
 
 CONSUMPTION_URL = "https://api.n2g-iona.net/v2/instantaneous"
 
 
-def _read_env(filename: str) -> dict:
-    env: dict[str, str] = {}
-    filepath = os.path.join(ENV_DIR, filename)
-    try:
-        with open(filepath, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if line and "=" in line and not line.startswith("#"):
-                    k, v = line.split("=", 1)
-                    env[k.strip()] = v.strip().strip('"')
-    except FileNotFoundError:
-        pass
-    return env
+@lru_cache(maxsize=1)
+def _headers(access_token: str) -> dict:
+    """Request-Header zum Token (nur bei Token-Wechsel neu gebaut).
+
+    Das dict wird zwischen Abrufen geteilt und darf nicht verändert werden.
+    """
+    return {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json",
+    }
 
 
 def _is_newer(new_ts, old_ts) -> bool:
@@ -53,27 +56,71 @@ def _is_newer(new_ts, old_ts) -> bool:
         return new_ts > old_ts
 
 
-def run() -> bool:
-    """Web-Verbrauchsdaten abrufen und in DB schreiben."""
-    web_env = _read_env("WebToken.env")
+def _update_db(
+    momentanleistung, momentanleistung_ts, gesamtverbrauch, gesamtverbrauch_ts
+) -> bool:
+    """Messwerte in meter_db.json schreiben (Executor)."""
+    entry = meter_store.get_meter()
+    if entry is None:
+        meter_store.update_meter(
+            source="WEB",
+            Gesamtverbrauch=gesamtverbrauch,
+            Gesamtverbrauch_unit="kWh",
+            Gesamtverbrauch_timestamp=gesamtverbrauch_ts,
+            Momentanleistung=momentanleistung,
+            Momentanleistung_unit="W",
+            Momentanleistung_timestamp=momentanleistung_ts,
+        )
+        _LOGGER.info("Web-Daten: Neuer Eintrag erstellt")
+        return True
+
+    updates = {}
+
+    if _is_newer(gesamtverbrauch_ts, entry.get("Gesamtverbrauch_timestamp")):
+        updates["Gesamtverbrauch"] = gesamtverbrauch
+        updates["Gesamtverbrauch_timestamp"] = gesamtverbrauch_ts
+
+    if _is_newer(momentanleistung_ts, entry.get("Momentanleistung_timestamp")):
+        updates["Momentanleistung"] = momentanleistung
+        updates["Momentanleistung_timestamp"] = momentanleistung_ts
+
+    # Unveränderte Felder filtert meter_store heraus (dann kein Schreibzugriff)
+    if updates:
+        updates["source"] = "WEB"
+        if meter_store.update_meter(**updates) and _LOGGER.isEnabledFor(
+            logging.DEBUG
+        ):
+            _LOGGER.debug(
+                "Web-Daten: DB aktualisiert (Quelle: WEB) – %s",
+                ", ".join(k for k in updates if not k.endswith("_timestamp")),
+            )
+
+    return True
+
+
+async def run(hass: HomeAssistant, session: aiohttp.ClientSession) -> bool:
+    """Web-Verbrauchsdaten abrufen und in DB schreiben.
+
+    HTTP läuft async über die (keep-alive) Session des DataManagers,
+    Datei-I/O im Executor.
+    """
+    web_env = await hass.async_add_executor_job(read_env_cached, "WebToken.env")
     access_token = web_env.get("ACCESS_TOKEN")
     if not access_token:
         _LOGGER.error("Web-Daten: ACCESS_TOKEN nicht vorhanden")
         return False
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-
     try:
-        response = requests.get(CONSUMPTION_URL, headers=headers, timeout=15)
-        if response.status_code == 401:
-            _LOGGER.warning("Web-Daten: 401 – Token ungültig")
-            return False
-        response.raise_for_status()
-        data = response.json()
-    except requests.RequestException as err:
+        async with asyncio.timeout(15):
+            async with session.get(
+                CONSUMPTION_URL, headers=_headers(access_token)
+            ) as response:
+                if response.status == 401:
+                    _LOGGER.warning("Web-Daten: 401 – Token ungültig")
+                    return False
+                response.raise_for_status()
+                data = await response.json(content_type=None, loads=_JSON_LOADS)
+    except (aiohttp.ClientError, TimeoutError, ValueError) as err:
         _LOGGER.error("Web-Daten: Fehler – %s", err)
         return False
 
@@ -87,54 +134,10 @@ def run() -> bool:
         _LOGGER.error("Web-Daten: Ungültiges Antwortformat – %s", err)
         return False
 
-    # In TinyDB schreiben
-    os.makedirs(DATA_DIR, exist_ok=True)
-    Device = Query()
-
-    if os.path.isfile(DB_PATH):
-        try:
-            with open(DB_PATH, "r", encoding="utf-8") as f:
-                json.load(f)
-        except (json.JSONDecodeError, ValueError):
-            _LOGGER.warning("meter_db.json ist beschädigt – wird neu erstellt")
-            os.remove(DB_PATH)
-
-    with TinyDB(DB_PATH) as db:
-        result = db.search(Device.device_id == "Stromzaehler")
-        if result:
-            entry = result[0]
-            updated = False
-
-            if _is_newer(gesamtverbrauch_ts, entry.get("Gesamtverbrauch_timestamp")):
-                entry["Gesamtverbrauch"] = gesamtverbrauch
-                entry["Gesamtverbrauch_timestamp"] = gesamtverbrauch_ts
-                updated = True
-
-            if _is_newer(momentanleistung_ts, entry.get("Momentanleistung_timestamp")):
-                entry["Momentanleistung"] = momentanleistung
-                entry["Momentanleistung_timestamp"] = momentanleistung_ts
-                updated = True
-
-            if updated:
-                entry["source"] = "WEB"
-                db.update(entry, Device.device_id == "Stromzaehler")
-                _LOGGER.debug("Web-Daten: DB aktualisiert (Quelle: WEB)")
-        else:
-            db.insert({
-                "device_id": "Stromzaehler",
-                "source": "WEB",
-                "Gesamtverbrauch": gesamtverbrauch,
-                "Gesamtverbrauch_unit": "kWh",
-                "Gesamtverbrauch_timestamp": gesamtverbrauch_ts,
-                "Momentanleistung": momentanleistung,
-                "Momentanleistung_unit": "W",
-                "Momentanleistung_timestamp": momentanleistung_ts,
-            })
-            _LOGGER.info("Web-Daten: Neuer Eintrag erstellt")
-
-    return True
-
-
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    raise SystemExit(0 if run() else 1)
+    return await hass.async_add_executor_job(
+        _update_db,
+        momentanleistung,
+        momentanleistung_ts,
+        gesamtverbrauch,
+        gesamtverbrauch_ts,
+    )
@@ -6,12 +6,13 @@ und vom Aufrufer übergeben (nicht aus .env gelesen).
 """
 
 import os
+import asyncio
 import logging
-import requests
-import urllib3
 
-# Nur die Warnung des Fallback-Requests unterdrücken (siehe _post_auth)
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from ..env_utils import atomic_write, read_env_cached
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,9 +20,22 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ENV_DIR = os.path.join(BASE_DIR, "env")
 
 AUTH_URL = "https://webapp.iona-energy.com/auth"
+_AUTH_HEADERS = {"Content-Type": "application/json"}
+
+
+async def _post(
+    session: aiohttp.ClientSession, data: dict, verify_ssl: bool = True
+) -> dict:
+    """Einzelner POST an die Auth-API, gibt die JSON-Antwort zurück."""
+    async with asyncio.timeout(15):
+        async with session.post(
+            AUTH_URL, headers=_AUTH_HEADERS, json=data, ssl=verify_ssl
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
 
 
-def _post_auth(data: dict) -> requests.Response:
+async def _post_auth(session: aiohttp.ClientSession, data: dict) -> dict:
     """POST an die Auth-API – mit TLS-Zertifikatsprüfung.
 
     Fallback ohne Verifizierung nur bei SSL-Fehlern: Der Auth-Server
@@ -30,51 +44,32 @@ def _post_auth(data: dict) -> requests.Response:
     Bestandsinstallationen funktionsfähig, ohne die Prüfung generell
     abzuschalten.
     """
-    headers = {"Content-Type": "application/json"}
     try:
-        return requests.post(AUTH_URL, headers=headers, json=data, timeout=15)
-    except requests.exceptions.SSLError as err:
+        return await _post(session, data)
+    except aiohttp.ClientSSLError as err:
         _LOGGER.warning(
             "TLS-Verifizierung für %s fehlgeschlagen (%s) – "
             "Fallback ohne Zertifikatsprüfung",
             AUTH_URL,
             err,
         )
-        return requests.post(
-            AUTH_URL, headers=headers, json=data, verify=False, timeout=15
-        )
-
-
-def _read_env(filename: str) -> dict:
-    """Liest eine .env Datei als dict (ohne os.environ zu verändern)."""
-    env: dict[str, str] = {}
-    filepath = os.path.join(ENV_DIR, filename)
-    try:
-        with open(filepath, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if line and "=" in line and not line.startswith("#"):
-                    k, v = line.split("=", 1)
-                    env[k.strip()] = v.strip().strip('"')
-    except FileNotFoundError:
-        pass
-    return env
+        return await _post(session, data, verify_ssl=False)
 
 
 def _save_token(token_data: dict) -> None:
     """Speichert Token-Daten in WebToken.env."""
     filepath = os.path.join(ENV_DIR, "WebToken.env")
     os.makedirs(ENV_DIR, exist_ok=True)
-    with open(filepath, "w", encoding="utf-8") as fh:
-        for key, value in token_data.items():
-            fh.write(f"{key.upper()}={value}\n")
-    os.chmod(filepath, 0o600)
+    payload = "".join(
+        f"{key.upper()}={value}\n" for key, value in token_data.items()
+    )
+    atomic_write(filepath, payload.encode("utf-8"), 0o600)
     _LOGGER.debug("Web-Token gespeichert in %s", filepath)
 
 
-def refresh() -> bool:
+async def refresh(hass: HomeAssistant, session: aiohttp.ClientSession) -> bool:
     """Erneuere den Access-Token mit dem gespeicherten Refresh-Token."""
-    web_env = _read_env("WebToken.env")
+    web_env = await hass.async_add_executor_job(read_env_cached, "WebToken.env")
     refresh_token = web_env.get("REFRESH_TOKEN")
 
     if not refresh_token:
@@ -84,25 +79,30 @@ def refresh() -> bool:
     data = {"method": "refresh", "refresh_token": refresh_token}
 
     try:
-        response = _post_auth(data)
-        response.raise_for_status()
-        token_data = response.json()
-        _save_token(token_data)
-        _LOGGER.info("Token erfolgreich per Refresh erneuert")
-        return True
-    except requests.RequestException as err:
+        token_data = await _post_auth(session, data)
+    except (aiohttp.ClientError, TimeoutError, ValueError) as err:
         _LOGGER.warning("Refresh fehlgeschlagen: %s – versuche Login", err)
         return False
 
+    await hass.async_add_executor_job(_save_token, token_data)
+    _LOGGER.info("Token erfolgreich per Refresh erneuert")
+    return True
+
 
-def run(username: str = "", password: str = "", use_refresh: bool = True) -> bool:
+async def run(
+    hass: HomeAssistant,
+    session: aiohttp.ClientSession,
+    username: str = "",
+    password: str = "",
+    use_refresh: bool = True,
+) -> bool:
     """Hole einen neuen Web-Token.
 
     Versucht zuerst den Refresh-Token, fällt bei Fehler auf Login zurück.
     Credentials werden als Parameter übergeben (aus HA ConfigEntry).
     Mit use_refresh=False wird direkt per Login authentifiziert.
     """
-    if use_refresh and refresh():
+    if use_refresh and await refresh(hass, session):
         return True
 
     if not username or not password:
@@ -112,18 +112,11 @@ def run(username: str = "", password: str = "", use_refresh: bool = True) -> boo
     data = {"method": "login", "username": username, "password": password}
 
     try:
-        response = _post_auth(data)
-        response.raise_for_status()
-        token_data = response.json()
-        _save_token(token_data)
-        _LOGGER.info("Neuer Web-Token erfolgreich per Login gespeichert")
-        return True
-    except requests.RequestException as err:
+        token_data = await _post_auth(session, data)
+    except (aiohttp.ClientError, TimeoutError, ValueError) as err:
         _LOGGER.error("Fehler beim Web-Token-Abruf: %s", err)
         return False
 
-
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    success = run()
-    raise SystemExit(0 if success else 1)
+    await hass.async_add_executor_job(_save_token, token_data)
+    _LOGGER.info("Neuer Web-Token erfolgreich per Login gespeichert")
+    return True
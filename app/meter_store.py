@@ -0,0 +1,103 @@
+"""Speicher für den Stromzähler-Eintrag in meter_db.json.
+
+Die Datei enthält nur einen einzigen Datensatz ("Stromzaehler").
+Statt sie bei jedem Abruf per TinyDB komplett zu lesen, zu parsen und
+neu zu schreiben, wird der Eintrag im Speicher gehalten und nur bei
+Änderungen atomar (tmp + fsync + rename) im TinyDB-kompatiblen Format
+geschrieben – sensor.py liest die Datei unverändert weiter.
+
+Nicht thread-safe: Aufrufer serialisieren über den Meter-DB-Lock
+des DataManagers.
+"""
+
+import os
+import json
+import logging
+
+from ..env_utils import atomic_write
+
+_LOGGER = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+DB_PATH = os.path.join(DATA_DIR, "meter_db.json")
+
+DEVICE_ID = "Stromzaehler"
+
+# Platzhalter für „Feld fehlt" (None ist ein gültiger Wert)
+_MISSING = object()
+
+# Zuletzt gelesener/geschriebener Eintrag mit (st_mtime_ns, st_size) der
+# Datei – wird die Datei gelöscht, wiederhergestellt oder extern geändert,
+# passt der Schlüssel nicht mehr und der Eintrag wird neu geladen
+_entry: dict | None = None
+_entry_key: tuple[int, int] | None = None
+
+
+def _stat_key() -> tuple[int, int] | None:
+    """(st_mtime_ns, st_size) von meter_db.json oder None wenn nicht vorhanden."""
+    try:
+        st = os.stat(DB_PATH)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _load() -> dict | None:
+    """Liest den Zähler-Eintrag aus meter_db.json."""
+    try:
+        with open(DB_PATH, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (json.JSONDecodeError, ValueError, OSError):
+        _LOGGER.warning("meter_db.json ist beschädigt – wird neu erstellt")
+        return None
+    for entry in data.get("_default", {}).values():
+        if isinstance(entry, dict) and entry.get("device_id") == DEVICE_ID:
+            return entry
+    return None
+
+
+def _save(entry: dict) -> None:
+    """Schreibt den Eintrag atomar im TinyDB-Format {'_default': {'1': …}}."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    payload = json.dumps({"_default": {"1": entry}}, ensure_ascii=False)
+    atomic_write(DB_PATH, payload.encode("utf-8"))
+
+
+def get_meter() -> dict | None:
+    """Gibt den aktuellen Zähler-Eintrag zurück (nicht verändern).
+
+    Im Normalfall bleibt ein os.stat; geparst wird nur, wenn sich
+    meter_db.json seit dem letzten Lesen/Schreiben geändert hat.
+    """
+    global _entry, _entry_key
+    key = _stat_key()
+    if key is None:
+        _entry = _entry_key = None
+        return None
+    if key != _entry_key:
+        _entry = _load()
+        _entry_key = key
+    return _entry
+
+
+def update_meter(**fields) -> bool:
+    """Übernimmt die Felder in den Eintrag und schreibt meter_db.json.
+
+    Felder mit unverändertem Wert werden ignoriert; ändert sich nichts,
+    bleibt die Datei unangetastet. Gibt True zurück, wenn geschrieben wurde.
+    """
+    global _entry, _entry_key
+    current = get_meter()
+    if current is None:
+        entry = {"device_id": DEVICE_ID}
+    else:
+        fields = {k: v for k, v in fields.items() if current.get(k, _MISSING) != v}
+        if not fields:
+            return False
+        entry = dict(current)
+    entry.update(fields)
+    _save(entry)
+    _entry = entry
+    _entry_key = _stat_key()
+    return True
@@ -11,85 +11,77 @@ Ergebnisse werden in vision_db.json gespeichert.
 import json
 import logging
 import os
+import time
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
+from itertools import accumulate, compress
+from operator import eq, itemgetter, le, sub
 
-from tinydb import TinyDB
+try:
+    import orjson
+except ImportError:  # orjson kommt mit HA Core; sonst Fallback auf json
+    orjson = None
+
+from ..env_utils import ACCOUNT_ENV, atomic_write, read_env_cached
 
 _LOGGER = logging.getLogger(__name__)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
-ENV_DIR = os.path.join(BASE_DIR, "env")
 
 SPOTPREIS_BRUTTO_DB = os.path.join(DATA_DIR, "spotpreise_brutto_db.json")
 VISION_DB = os.path.join(DATA_DIR, "vision_db.json")
-ACCOUNT_ENV = os.path.join(ENV_DIR, "account.env")
 
 # Spotpreis-Intervall: 15 Minuten
 INTERVALL_MIN = 15
 EINTRAEGE_PRO_STUNDE = 60 // INTERVALL_MIN
 
+# Geparste Brutto-Spotpreise: (st_mtime_ns, Preise) – siehe _lade_spotpreise
+_PREISE_CACHE: tuple[int, dict[str, list]] | None = None
+
 # Nachtzeit (Durchschnitt Deutschland: Sonnenuntergang ~20:00, Sonnenaufgang ~07:00)
 NACHT_START = 20
 NACHT_ENDE = 7
 
 
-def _read_stunden_block() -> int:
+def _read_stunden_block(account: dict) -> int:
     """Liest den Stunden-Block aus account.env (min 1, Standard 2)."""
     try:
-        with open(ACCOUNT_ENV, "r", encoding="utf-8") as fh:
-            for line in fh:
-                if line.startswith("stunden_block="):
-                    val = line.strip().split("=", 1)[1].strip('"')
-                    return max(1, int(val))
-    except (FileNotFoundError, ValueError, OSError):
-        pass
-    return 2
+        return max(1, int(account.get("stunden_block", 2)))
+    except (ValueError, TypeError):
+        return 2
 
 
-def _read_vorausschau_stunden() -> int:
+def _read_vorausschau_stunden(account: dict) -> int:
     """Liest die Vorausschau-Stunden aus account.env (min = Zeitraum+1)."""
     try:
-        stunden_block = _read_stunden_block()
-        min_val = stunden_block + 1
-        with open(ACCOUNT_ENV, "r", encoding="utf-8") as fh:
-            for line in fh:
-                if line.startswith("vorausschau_stunden="):
-                    val = line.strip().split("=", 1)[1].strip('"')
-                    return max(min_val, int(val))
-    except (FileNotFoundError, ValueError, OSError):
-        pass
-    return 12
-
-
-def _read_nur_nacht() -> bool:
+        min_val = _read_stunden_block(account) + 1
+        return max(min_val, int(account.get("vorausschau_stunden", 12)))
+    except (ValueError, TypeError):
+        return 12
+
+
+def _read_nur_nacht(account: dict) -> bool:
     """Liest den Nacht-Modus aus account.env."""
-    try:
-        with open(ACCOUNT_ENV, "r", encoding="utf-8") as fh:
-            for line in fh:
-                if line.startswith("nur_nacht="):
-                    val = line.strip().split("=", 1)[1].strip('"')
-                    return val.lower() == "true"
-    except (FileNotFoundError, ValueError, OSError):
-        pass
-    return False
+    return account.get("nur_nacht", "False").lower() == "true"
 
 
-def _read_danach_wieder_stunden() -> int:
+def _read_danach_wieder_stunden(account: dict) -> int:
     """Liest die 'danach wieder'-Stunden aus account.env.
 
     Wartezeit nach Fensterende bis zur automatischen Neuberechnung:
     0 = sofort (1 Minute nach Fensterende), >0 = so viele Stunden später.
     """
     try:
-        with open(ACCOUNT_ENV, "r", encoding="utf-8") as fh:
-            for line in fh:
-                if line.startswith("danach_wieder_stunden="):
-                    val = line.strip().split("=", 1)[1].strip('"')
-                    return max(0, int(val))
-    except (FileNotFoundError, ValueError, OSError):
-        pass
-    return 0
+        return max(0, int(account.get("danach_wieder_stunden", 0)))
+    except (ValueError, TypeError):
+        return 0
+
+
+def _lade_json(filepath: str) -> dict:
+    with open(filepath, "rb") as fh:
+        raw = fh.read()
+    return orjson.loads(raw) if orjson else json.loads(raw)
 
 
 def _lade_aktuelle_vision() -> dict | None:
@@ -97,15 +89,25 @@ def _lade_aktuelle_vision() -> dict | None:
     if not os.path.isfile(VISION_DB):
         return None
     try:
-        with open(VISION_DB, "r", encoding="utf-8") as fh:
-            import json as _json
-            data = _json.load(fh)
+        data = _lade_json(VISION_DB)
         items = list(data.get("_default", {}).values())
         return items[0] if items else None
     except Exception:
         return None
 
 
+def _speichere_vision(result: dict) -> None:
+    """Schreibt das Ergebnis atomar im TinyDB-Format {'_default': {'1': …}}.
+
+    Die Datei enthält immer genau einen Datensatz – TinyDB (lesen,
+    truncate, insert) ist dafür unnötig; sensor.py liest sie unverändert.
+    DATA_DIR existiert hier immer: der DataManager legt es beim Start an,
+    und ohne Brutto-Preise darin wird gar nicht erst geschrieben.
+    """
+    payload = json.dumps({"_default": {"1": result}}).encode("utf-8")
+    atomic_write(VISION_DB, payload)
+
+
 def _aktualisiere_preis(
     aktuelle: dict,
     aktueller_preis: float | None,
@@ -117,63 +119,88 @@ def _aktualisiere_preis(
     endzeit/naechste_berechnung werden mitgeschrieben, damit die Felder
     auch in älteren DBs auf jedem Freeze-Durchlauf entstehen.
     """
+    aktuelle["aktueller_preis"] = aktueller_preis
+    aktuelle["timestamp"] = datetime.now().isoformat()
+    if endzeit is not None:
+        aktuelle["endzeit"] = endzeit.isoformat()
+    if naechste_berechnung is not None:
+        aktuelle["naechste_berechnung"] = naechste_berechnung.isoformat()
     try:
-        aktuelle["aktueller_preis"] = aktueller_preis
-        aktuelle["timestamp"] = datetime.now().isoformat()
-        if endzeit is not None:
-            aktuelle["endzeit"] = endzeit.isoformat()
-        if naechste_berechnung is not None:
-            aktuelle["naechste_berechnung"] = naechste_berechnung.isoformat()
-        os.makedirs(DATA_DIR, exist_ok=True)
-        with TinyDB(VISION_DB) as db:
-            db.truncate()
-            db.insert(aktuelle)
-    except Exception as err:  # noqa: BLE001
+        _speichere_vision(aktuelle)
+    except OSError as err:
         _LOGGER.error("Vision: Fehler beim Preis-Update – %s", err)
 
 
-def _lade_spotpreise() -> list[dict]:
-    """Lädt Brutto-Spotpreise und gibt sortierte Liste zurück."""
-    if not os.path.isfile(SPOTPREIS_BRUTTO_DB):
+def _lade_spotpreise() -> dict[str, list]:
+    """Lädt Brutto-Spotpreise, zeitlich sortiert.
+
+    Rückgabe als parallele Listen (SoA) "timestamp", "timestamp_str",
+    "epoch" (Unix-Sekunden), "price" (€/kWh) und "nacht" (Startzeit in der
+    Nachtzeit) – die Fenstersuche arbeitet direkt auf den Listen und
+    vergleicht Zeiten als Ganzzahlen.
+    Leeres dict, wenn keine Preise vorhanden sind.
+
+    Das Ergebnis wird bis zur nächsten Änderung der Datei (mtime) gecacht
+    und darf vom Aufrufer nicht verändert werden.
+    """
+    global _PREISE_CACHE
+    try:
+        mtime_ns = os.stat(SPOTPREIS_BRUTTO_DB).st_mtime_ns
+    except OSError:
         _LOGGER.warning("Vision: Brutto-DB nicht vorhanden: %s", SPOTPREIS_BRUTTO_DB)
-        return []
+        return {}
+    if _PREISE_CACHE is not None and _PREISE_CACHE[0] == mtime_ns:
+        return _PREISE_CACHE[1]
 
     try:
-        with open(SPOTPREIS_BRUTTO_DB, "r", encoding="utf-8") as fh:
-            data = json.load(fh)
-    except (json.JSONDecodeError, OSError) as err:
+        data = _lade_json(SPOTPREIS_BRUTTO_DB)
+    except (ValueError, OSError) as err:
         _LOGGER.error("Vision: Fehler beim Lesen der Brutto-DB – %s", err)
-        return []
+        return {}
 
-    preise = []
+    eintraege = []
     for entry in data.get("_default", {}).values():
         if "timestamp" not in entry or "price" not in entry:
             continue
         try:
-            ts = datetime.fromisoformat(entry["timestamp"].replace("Z", "+00:00"))
-            preise.append({
-                "timestamp": ts,
-                "timestamp_str": entry["timestamp"],
-                "price": entry["price"] / 1000,  # €/MWh → €/kWh
-            })
+            ts = datetime.fromisoformat(entry["timestamp"])
+            eintraege.append(
+                (ts, entry["timestamp"], entry["price"] / 1000)  # €/MWh → €/kWh
+            )
         except (ValueError, TypeError):
             continue
 
-    preise.sort(key=lambda x: x["timestamp"])
+    if not eintraege:
+        return {}
+    # Die Einträge liegen in Einfügereihenfolge meist schon zeitlich sortiert
+    # vor – dann genügt ein linearer Vergleich statt Sortierung mit Key
+    zeiten = list(map(itemgetter(0), eintraege))
+    if not all(map(le, zeiten, zeiten[1:])):
+        eintraege.sort(key=itemgetter(0))
+    ts_list, ts_str, price = (list(col) for col in zip(*eintraege))
+    preise = {
+        "timestamp": ts_list,
+        "timestamp_str": ts_str,
+        "epoch": [int(ts.timestamp()) for ts in ts_list],
+        "price": price,
+        "nacht": [_ist_nachtzeit(ts) for ts in ts_list],
+    }
+    _PREISE_CACHE = (mtime_ns, preise)
     return preise
 
 
-def _finde_aktuellen_preis(preise: list[dict]) -> float | None:
+def _finde_aktuellen_preis(preise: dict[str, list]) -> float | None:
     """Aktuellen 15-Min-Preis finden."""
-    now = datetime.now().astimezone()
-    for eintrag in preise:
-        ts = eintrag["timestamp"]
-        if ts <= now < ts + timedelta(minutes=INTERVALL_MIN):
-            return round(eintrag["price"], 5)
+    now = time.time()
+    epoch = preise["epoch"]
+    # Letzter Slot mit Start <= now (Liste sortiert → binäre Suche)
+    idx = bisect_right(epoch, now) - 1
+    if idx >= 0 and now < epoch[idx] + INTERVALL_MIN * 60:
+        return round(preise["price"][idx], 5)
     # Fallback: nächster zukünftiger Eintrag
-    for eintrag in preise:
-        if eintrag["timestamp"] >= now:
-            return round(eintrag["price"], 5)
+    idx = bisect_left(epoch, now)
+    if idx < len(epoch):
+        return round(preise["price"][idx], 5)
     return None
 
 
@@ -182,55 +209,79 @@ def _ist_nachtzeit(dt: datetime) -> bool:
 
 
 def _finde_guenstigste_startzeit(
-    preise: list[dict],
+    preise: dict[str, list],
     stunden: int,
     nur_nacht: bool = False,
     max_vorausschau_h: int = 12,
-) -> tuple[dict | None, float | None]:
+) -> tuple[int | None, float | None]:
     """Findet die günstigste zusammenhängende Startzeit.
 
     Der *Start* des Blocks muss innerhalb von max_vorausschau_h Stunden
     liegen.  Der Block selbst darf darüber hinausgehen.
     Bei nur_nacht=True werden nur Nacht-Zeitfenster (20–07 Uhr) betrachtet,
     die Vorausschau-Grenze gilt trotzdem für den Startpunkt.
+    Gibt den Index des Startpunkts in preise und den Durchschnittspreis zurück.
     """
     anzahl = stunden * EINTRAEGE_PRO_STUNDE
-    now = datetime.now().astimezone()
-    grenze = now + timedelta(hours=max_vorausschau_h)
+    now = time.time()
+    grenze = now + max_vorausschau_h * 3600
 
-    future = [e for e in preise if e["timestamp"] >= now]
+    erster = bisect_left(preise["epoch"], now)
+    future = range(erster, len(preise["epoch"]))
     if nur_nacht:
-        future = [e for e in future if _ist_nachtzeit(e["timestamp"])]
+        future = list(compress(future, preise["nacht"][erster:]))
 
     if len(future) < anzahl:
         return None, None
 
-    min_avg = float("inf")
-    min_start = None
-
-    for i in range(len(future) - anzahl + 1):
-        window = future[i : i + anzahl]
-
-        # Startpunkt muss innerhalb der Vorausschau liegen
-        if window[0]["timestamp"] >= grenze:
-            continue
-
-        # Prüfe Aufeinanderfolge (max 20 Min Abstand)
-        consecutive = all(
-            window[j + 1]["timestamp"] - window[j]["timestamp"] <= timedelta(minutes=20)
-            for j in range(len(window) - 1)
-        )
-        if not consecutive:
-            continue
+    ts = [preise["epoch"][i] for i in future]
 
-        avg = sum(e["price"] for e in window) / anzahl
-        if avg < min_avg:
-            min_avg = avg
-            min_start = window[0]
-
-    if min_start is None:
+    # Startpunkt muss innerhalb der Vorausschau liegen (Liste sortiert).
+    # Einträge hinter dem letzten möglichen Fenster können das Ergebnis
+    # nicht mehr beeinflussen – alles Weitere nur bis dorthin berechnen.
+    ende = min(len(ts) - anzahl + 1, bisect_left(ts, grenze))
+    if ende <= 0:
+        return None, None
+    del ts[ende + anzahl - 1 :]
+
+    # Fenstersummen per Präfixsumme in O(1) statt sum() über jedes Fenster
+    werte = [preise["price"][i] for i in future[: len(ts)]]
+    cum = list(accumulate(werte, initial=0.0))
+
+    # Lücken (> 20 Min Abstand) zwischen Nachbarn; ein Fenster [i, i+anzahl)
+    # ist zusammenhängend, wenn seine Lückenzahl per Präfixsumme 0 ergibt
+    max_abstand = 20 * 60
+    luecken = list(accumulate(
+        (b - a > max_abstand for a, b in zip(ts, ts[1:])), initial=0
+    ))
+
+    # Alle Fenstersummen in einem Durchlauf (map läuft in C)
+    summen = list(map(sub, cum[anzahl:], cum))
+
+    # Ohne Lücken (Normalfall: lückenlose 15-Min-Werte) ist jedes Fenster
+    # gültig, sonst filtert die Bitmap die zusammenhängenden heraus
+    kandidaten = range(ende)
+    if luecken[-1]:
+        gueltig = map(eq, luecken[anzahl - 1 :], luecken[:ende])
+        kandidaten = compress(kandidaten, gueltig)
+
+    kandidaten = list(kandidaten)
+    if not kandidaten:
         return None, None
-    return min_start, min_avg
+
+    # Präfixsummen-Differenzen tragen Rundungsfehler: sie wählen nur die
+    # Fenster nahe am Minimum vor. Unter diesen entscheidet die exakte
+    # Fenstersumme, bei Gleichstand das früheste Fenster (striktes <).
+    min_summe = min(map(summen.__getitem__, kandidaten))
+    toleranz = 1e-9 * max(1.0, max(map(abs, cum)))
+    best = None
+    best_avg = float("inf")
+    for i in kandidaten:
+        if summen[i] <= min_summe + toleranz:
+            avg = sum(werte[i : i + anzahl]) / anzahl
+            if avg < best_avg:
+                best, best_avg = i, avg
+    return future[best], best_avg
 
 
 def run(force: bool = False) -> bool:
@@ -243,10 +294,12 @@ def run(force: bool = False) -> bool:
       - Danach → automatische Neuberechnung.
     force=True: Immer neu berechnen (manueller Button).
     """
-    stunden = _read_stunden_block()
-    vorausschau = _read_vorausschau_stunden()
-    nur_nacht = _read_nur_nacht()
-    danach_wieder = _read_danach_wieder_stunden()
+    # account.env einmal holen (gecacht), alle Einstellungen daraus lesen
+    account = read_env_cached(ACCOUNT_ENV)
+    stunden = _read_stunden_block(account)
+    vorausschau = _read_vorausschau_stunden(account)
+    nur_nacht = _read_nur_nacht(account)
+    danach_wieder = _read_danach_wieder_stunden(account)
 
     preise = _lade_spotpreise()
     if not preise:
@@ -273,10 +326,11 @@ def run(force: bool = False) -> bool:
 
                     if now < startzeit:
                         # Startzeit liegt noch in der Zukunft → eingefroren
-                        _LOGGER.debug(
-                            "Vision: Startzeit noch in der Zukunft (%s) – eingefroren",
-                            startzeit.strftime("%d.%m. %H:%M"),
-                        )
+                        if _LOGGER.isEnabledFor(logging.DEBUG):
+                            _LOGGER.debug(
+                                "Vision: Startzeit noch in der Zukunft (%s) – eingefroren",
+                                startzeit.strftime("%d.%m. %H:%M"),
+                            )
                         _aktualisiere_preis(
                             aktuelle, aktueller_preis, window_end, recalc_time
                         )
@@ -284,10 +338,11 @@ def run(force: bool = False) -> bool:
 
                     if now < recalc_time:
                         # Wartezeit nach Fensterende noch nicht vorbei
-                        _LOGGER.debug(
-                            "Vision: Warte auf Neuberechnung (%s) – eingefroren",
-                            recalc_time.strftime("%d.%m. %H:%M"),
-                        )
+                        if _LOGGER.isEnabledFor(logging.DEBUG):
+                            _LOGGER.debug(
+                                "Vision: Warte auf Neuberechnung (%s) – eingefroren",
+                                recalc_time.strftime("%d.%m. %H:%M"),
+                            )
                         _aktualisiere_preis(
                             aktuelle, aktueller_preis, window_end, recalc_time
                         )
@@ -303,13 +358,13 @@ def run(force: bool = False) -> bool:
     start, avg = _finde_guenstigste_startzeit(
         preise, stunden, nur_nacht=nur_nacht, max_vorausschau_h=vorausschau
     )
-    guenstigste_zeit = start["timestamp_str"] if start else None
+    guenstigste_zeit = preise["timestamp_str"][start] if start is not None else None
     guenstigste_summe = round(avg, 5) if avg and avg != float("inf") else None
 
     endzeit = None
     naechste_berechnung = None
-    if start:
-        endzeit = start["timestamp"] + timedelta(hours=stunden)
+    if start is not None:
+        endzeit = preise["timestamp"][start] + timedelta(hours=stunden)
         naechste_berechnung = endzeit + timedelta(hours=danach_wieder, minutes=1)
 
     result = {
@@ -326,17 +381,10 @@ def run(force: bool = False) -> bool:
     }
 
     try:
-        os.makedirs(DATA_DIR, exist_ok=True)
-        with TinyDB(VISION_DB) as db:
-            db.truncate()
-            db.insert(result)
-        _LOGGER.info("Vision: Daten gespeichert (Preis: %s €/kWh)", aktueller_preis)
-        return True
-    except Exception as err:  # noqa: BLE001
+        _speichere_vision(result)
+    except OSError as err:
         _LOGGER.error("Vision: Fehler beim Schreiben – %s", err)
         return False
+    _LOGGER.info("Vision: Daten gespeichert (Preis: %s €/kWh)", aktueller_preis)
+    return True
 
-
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    raise SystemExit(0 if run() else 1)
@@ -6,6 +6,8 @@ Ermöglicht die Konfiguration über die Home Assistant UI:
 - mein Strom Vision aktivieren/deaktivieren
 """
 
+from importlib.util import find_spec
+
 import voluptuous as vol
 
 from homeassistant import config_entries
@@ -39,10 +41,10 @@ from .env_utils import (
 )
 
 # Vision-Häkchen nur anzeigen wenn die Module verfügbar sind
+# (nur Metadaten-Lookup, das Modul selbst wird nicht initialisiert)
 try:
-    from .app import get_spot_prices as _  # noqa: F401
-    _VISION_AVAILABLE = True
-except ImportError:
+    _VISION_AVAILABLE = find_spec(f"{__package__}.app.get_spot_prices") is not None
+except ModuleNotFoundError:  # ganzes app-Paket fehlt
     _VISION_AVAILABLE = False
 
 
@@ -4,17 +4,20 @@ Koordiniert alle Datenabfragen über Home Assistant's native Scheduling.
 Ersetzt die alte Subprocess-/Threading-Architektur (main.py) durch
 HA-konforme async_track_time_interval Tasks.
 
-Jedes App-Skript wird als importierbare Funktion aufgerufen und läuft
-im HA Executor Thread-Pool (kein Blocking im Event-Loop).
+Jedes App-Skript wird als importierbare Funktion aufgerufen. HTTP-Module
+(Tokens, LAN-/Web-Daten) laufen async über die HA-aiohttp-Session, alle
+übrigen im HA Executor Thread-Pool (kein Blocking im Event-Loop).
 """
 
 import os
 import json
+import asyncio
 import logging
-import threading
 from datetime import datetime, timedelta
+from functools import partial
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.event import (
     async_track_point_in_time,
     async_track_time_interval,
@@ -78,7 +81,14 @@ class IonaDataManager:
     def __init__(self, hass: HomeAssistant) -> None:
         self.hass = hass
         self._cancel_callbacks: list = []
-        self._meter_db_lock = threading.Lock()
+        # Periodische Tasks: (Coroutine, Intervall in s), je ein Timer
+        # (siehe _start_timers); laufende Tasks werden nicht doppelt gestartet
+        self._tasks: list[tuple] = []
+        self._running: set[str] = set()
+        # Gemeinsame HA-Session (keep-alive) für alle HTTP-Abrufe; gehört
+        # Home Assistant und wird daher in async_stop nicht geschlossen.
+        self._session = async_get_clientsession(hass)
+        self._meter_db_lock = asyncio.Lock()
         self._auth_fail_count: int = 0
         self._lan_fail_count: int = 0
         # Edge-Trigger-Flags: Notification nur einmal beim Übergang senden,
@@ -129,8 +139,9 @@ class IonaDataManager:
         self._schedule(self._task_tariff_data, INTERVAL_TARIFF_DATA)
         self._schedule(self._task_calc_preise, INTERVAL_CALC_PREISE)
         self._schedule(self._task_vision, INTERVAL_VISION)
+        self._start_timers()
 
-        _LOGGER.info("iona-ha Datenmanager gestartet – %d Tasks aktiv", len(self._cancel_callbacks))
+        _LOGGER.info("iona-ha Datenmanager gestartet – %d Tasks aktiv", len(self._tasks))
 
     async def async_stop(self) -> None:
         """Stoppe alle periodischen Tasks."""
@@ -148,16 +159,48 @@ class IonaDataManager:
 
     def _schedule(self, coro_func, interval_seconds: int) -> None:
         """Registriert eine Coroutine als periodischen Task."""
-        async def _wrapper(_now=None):
-            try:
-                await coro_func()
-            except Exception:  # noqa: BLE001
-                _LOGGER.exception("Fehler in periodischem Task %s", coro_func.__name__)
+        self._tasks.append((coro_func, int(interval_seconds)))
+
+    def _start_timers(self) -> None:
+        """Einen HA-Timer je Task mit dessen eigenem Intervall registrieren.
+
+        Ein gemeinsamer Takt im ggT der Intervalle würde bei frei
+        wählbaren LAN-Intervallen (z. B. 7 s) auf 1 s fallen und den
+        Event-Loop jede Sekunde wecken.
+        """
+        for coro_func, interval in self._tasks:
+            cancel = async_track_time_interval(
+                self.hass,
+                partial(self._start_task, coro_func),
+                timedelta(seconds=interval),
+            )
+            self._cancel_callbacks.append(cancel)
+
+    @callback
+    def _start_task(self, coro_func, _now=None) -> None:
+        """Fälligen Task als eigenen Background-Task starten.
 
-        cancel = async_track_time_interval(
-            self.hass, _wrapper, timedelta(seconds=interval_seconds)
+        So hält ein langsamer Abruf (z. B. Spotpreise) das LAN-Polling
+        nicht auf. Läuft der Task beim nächsten Fälligkeitstermin noch,
+        wird dieser übersprungen.
+        """
+        name = coro_func.__name__
+        if name in self._running:
+            _LOGGER.debug("Task %s läuft noch – Durchlauf übersprungen", name)
+            return
+        self._running.add(name)
+        self.hass.async_create_background_task(
+            self._run_task(coro_func), f"iona-ha {name}"
         )
-        self._cancel_callbacks.append(cancel)
+
+    async def _run_task(self, coro_func) -> None:
+        """Periodischen Task ausführen; Fehler loggen statt abbrechen."""
+        try:
+            await coro_func()
+        except Exception:  # noqa: BLE001
+            _LOGGER.exception("Fehler in periodischem Task %s", coro_func.__name__)
+        finally:
+            self._running.discard(coro_func.__name__)
 
     # ------------------------------------------------------------------ #
     #  Hilfsfunktionen                                                    #
@@ -176,6 +219,37 @@ class IonaDataManager:
         except OSError:
             return False
 
+    @classmethod
+    def _precheck(
+        cls,
+        *,
+        vision: bool = False,
+        env_files: tuple[str, ...] = (),
+        data_files: tuple[str, ...] = (),
+        stale: tuple[str, int] | None = None,
+    ) -> str | None:
+        """Alle Vorbedingungen eines Tasks in einem Executor-Job prüfen.
+
+        Gibt None zurück, wenn der Task laufen soll, sonst den Grund fürs
+        Überspringen. stale=(Datei, Minuten): nur laufen, wenn die Datei
+        fehlt oder älter ist.
+
+        Ohne vision=True sind es reine stat-Aufrufe, die direkt im Event-Loop
+        laufen dürfen; mit vision=True kann account.env gelesen werden –
+        dann nur per Executor aufrufen.
+        """
+        if vision and not is_vision_enabled():
+            return "Vision nicht aktiviert"
+        for filename in env_files:
+            if not env_file_exists(filename):
+                return f"{filename} fehlt"
+        for filename in data_files:
+            if not os.path.isfile(os.path.join(_DATA_DIR, filename)):
+                return f"{filename} fehlt"
+        if stale is not None and cls._is_data_fresh(*stale):
+            return f"{stale[0]} noch aktuell"
+        return None
+
     def _handle_vision_fetch_result(self, ok: bool, source: str) -> None:
         """Edge-getriggerte Notification, wenn enviaM keine Vision-Daten liefert.
 
@@ -240,10 +314,7 @@ class IonaDataManager:
 
         # 3. Zählerdaten holen (LAN bevorzugt, Web nur als Fallback)
         await self._task_lan_data()
-        lan_ok = await self.hass.async_add_executor_job(
-            self._is_data_fresh, "meter_db.json", FRESHNESS_METER
-        )
-        if not lan_ok:
+        if not self._is_data_fresh("meter_db.json", FRESHNESS_METER):
             await self._task_web_data()
 
         # 4. Spotpreise IMMER holen beim Start
@@ -278,9 +349,7 @@ class IonaDataManager:
             username = entry.data.get(CONF_USERNAME, "")
             password = entry.data.get(CONF_PASSWORD, "")
 
-        ok = await self.hass.async_add_executor_job(
-            _run, username, password
-        )
+        ok = await _run(self.hass, self._session, username, password)
 
         if ok:
             if self._auth_failed_notified:
@@ -310,28 +379,23 @@ class IonaDataManager:
 
     async def _task_lan_token(self) -> None:
         """LAN-Token erneuern – nur wenn Web-Token vorhanden."""
-        if not await self.hass.async_add_executor_job(env_file_exists, WEB_TOKEN_ENV):
-            _LOGGER.debug("Überspringe LAN-Token: Kein Web-Token vorhanden")
+        if skip := self._precheck(env_files=(WEB_TOKEN_ENV,)):
+            _LOGGER.debug("Überspringe LAN-Token: %s", skip)
             return
         _LOGGER.info("Starte: get_lan_token")
         from .app.get_lan_token import run as _run
-        ok = await self.hass.async_add_executor_job(_run)
+        ok = await _run(self.hass, self._session)
         _LOGGER.info("Fertig: get_lan_token → %s", "OK" if ok else "FEHLER")
 
     async def _task_lan_data(self) -> None:
         """Lokale Zählerdaten von der iONA Box abrufen."""
-        if not await self.hass.async_add_executor_job(env_file_exists, LAN_TOKEN_ENV):
-            _LOGGER.debug("Überspringe LAN-Daten: Kein LAN-Token vorhanden")
+        if skip := self._precheck(env_files=(LAN_TOKEN_ENV,)):
+            _LOGGER.debug("Überspringe LAN-Daten: %s", skip)
             return
         _LOGGER.debug("Starte: get_lan_data")
         from .app.get_lan_data import run as _run
-        lock = self._meter_db_lock
-
-        def _locked_run():
-            with lock:
-                return _run()
-
-        ok = await self.hass.async_add_executor_job(_locked_run)
+        async with self._meter_db_lock:
+            ok = await _run(self.hass, self._session)
 
         if ok:
             if self._lan_unreachable_notified:
@@ -375,31 +439,25 @@ class IonaDataManager:
         LAN schreibt alle 5s in meter_db.json.  Wenn die Datei älter als
         1 Minute ist, liefert LAN offensichtlich nicht – dann Web-Fallback.
         """
-        if not await self.hass.async_add_executor_job(env_file_exists, WEB_TOKEN_ENV):
-            return
-        if await self.hass.async_add_executor_job(
-            self._is_data_fresh, "meter_db.json", FRESHNESS_METER
+        if self._precheck(
+            env_files=(WEB_TOKEN_ENV,), stale=("meter_db.json", FRESHNESS_METER)
         ):
             return
         _LOGGER.info("Starte: get_web_data (LAN liefert nicht, Fallback)")
         from .app.get_web_data import run as _run
-        lock = self._meter_db_lock
-
-        def _locked_run():
-            with lock:
-                return _run()
-
-        ok = await self.hass.async_add_executor_job(_locked_run)
+        async with self._meter_db_lock:
+            ok = await _run(self.hass, self._session)
         _LOGGER.info("Fertig: get_web_data → %s", "OK" if ok else "FEHLER")
 
     async def _task_spot_prices(self) -> None:
         """Spotpreise von enviaM abrufen – nur wenn Vision aktiv und veraltet."""
-        if not await self.hass.async_add_executor_job(is_vision_enabled):
-            return
-        if not await self.hass.async_add_executor_job(env_file_exists, WEB_TOKEN_ENV):
-            return
         if await self.hass.async_add_executor_job(
-            self._is_data_fresh, "spotpreise_db.json", FRESHNESS_SPOT_PRICES
+            partial(
+                self._precheck,
+                vision=True,
+                env_files=(WEB_TOKEN_ENV,),
+                stale=("spotpreise_db.json", FRESHNESS_SPOT_PRICES),
+            )
         ):
             return
         _LOGGER.info("Starte: get_spot_prices")
@@ -429,12 +487,13 @@ class IonaDataManager:
 
     async def _task_tariff_data(self) -> None:
         """Tarifdaten von enviaM abrufen – nur wenn Vision aktiv und veraltet."""
-        if not await self.hass.async_add_executor_job(is_vision_enabled):
-            return
-        if not await self.hass.async_add_executor_job(env_file_exists, WEB_TOKEN_ENV):
-            return
         if await self.hass.async_add_executor_job(
-            self._is_data_fresh, "tariff_db.json", FRESHNESS_TARIFF
+            partial(
+                self._precheck,
+                vision=True,
+                env_files=(WEB_TOKEN_ENV,),
+                stale=("tariff_db.json", FRESHNESS_TARIFF),
+            )
         ):
             return
         _LOGGER.info("Starte: get_tariff_data")
@@ -464,16 +523,15 @@ class IonaDataManager:
 
     async def _task_calc_preise(self) -> None:
         """Bruttopreise berechnen – nur wenn Vision aktiv und Quelldaten vorhanden."""
-        if not await self.hass.async_add_executor_job(is_vision_enabled):
-            return
-
-        def _check_sources():
-            spot = os.path.isfile(os.path.join(_DATA_DIR, "spotpreise_db.json"))
-            tariff = os.path.isfile(os.path.join(_DATA_DIR, "tariff_db.json"))
-            return spot and tariff
-
-        if not await self.hass.async_add_executor_job(_check_sources):
-            _LOGGER.debug("Überspringe calc_preise: Quelldaten fehlen")
+        skip = await self.hass.async_add_executor_job(
+            partial(
+                self._precheck,
+                vision=True,
+                data_files=("spotpreise_db.json", "tariff_db.json"),
+            )
+        )
+        if skip:
+            _LOGGER.debug("Überspringe calc_preise: %s", skip)
             return
         _LOGGER.info("Starte: calc_preise")
         from .app.calc_preise import run as _run
@@ -482,16 +540,15 @@ class IonaDataManager:
 
     async def _task_vision(self) -> None:
         """Vision-Berechnung – eingefroren außer wenn Neuberechnung fällig."""
-        if not await self.hass.async_add_executor_job(is_vision_enabled):
-            return
-
-        def _check_brutto():
-            return os.path.isfile(
-                os.path.join(_DATA_DIR, "spotpreise_brutto_db.json")
+        skip = await self.hass.async_add_executor_job(
+            partial(
+                self._precheck,
+                vision=True,
+                data_files=("spotpreise_brutto_db.json",),
             )
-
-        if not await self.hass.async_add_executor_job(_check_brutto):
-            _LOGGER.debug("Überspringe Vision: spotpreise_brutto_db.json fehlt")
+        )
+        if skip:
+            _LOGGER.debug("Überspringe Vision: %s", skip)
             return
         _LOGGER.debug("Starte: vision (force=False)")
         from .app.vision import run as _run
@@ -501,16 +558,15 @@ class IonaDataManager:
 
     async def _task_vision_force(self) -> None:
         """Vision-Berechnung erzwingen – immer neu berechnen (manueller Button)."""
-        if not await self.hass.async_add_executor_job(is_vision_enabled):
-            return
-
-        def _check_brutto():
-            return os.path.isfile(
-                os.path.join(_DATA_DIR, "spotpreise_brutto_db.json")
+        skip = await self.hass.async_add_executor_job(
+            partial(
+                self._precheck,
+                vision=True,
+                data_files=("spotpreise_brutto_db.json",),
             )
-
-        if not await self.hass.async_add_executor_job(_check_brutto):
-            _LOGGER.debug("Überspringe Vision (force): spotpreise_brutto_db.json fehlt")
+        )
+        if skip:
+            _LOGGER.debug("Überspringe Vision (force): %s", skip)
             return
         _LOGGER.info("Starte: vision (force=True)")
         from .app.vision import run as _run
@@ -572,4 +628,4 @@ class IonaDataManager:
         self._vision_recalc_cancel = async_track_point_in_time(
             self.hass, _on_vision_recalc, when
         )
-        _LOGGER.debug("Vision: Neuberechnung geplant für %s", when.isoformat())
+        _LOGGER.debug("Vision: Neuberechnung geplant für %s", when)
@@ -5,12 +5,22 @@ Backups werden im Home Assistant .storage Verzeichnis gespeichert,
 das von HACS-Updates nicht betroffen ist.
 """
 
+import asyncio
 import os
 import shutil
 import logging
 
+from .env_utils import ENV_DIR
+
 _LOGGER = logging.getLogger(__name__)
 
+# Pfade einmalig beim Import auflösen (env/ wie in env_utils)
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_DATA_DIR = os.path.join(_BASE_DIR, "app", "data")
+
+# Signatur des letzten Backups je Backup-Verzeichnis (wird nie wiederhergestellt)
+_SENTINEL = ".last_backup_mtime"
+
 
 def get_backup_dir(hass):
     """Gibt den Pfad zum Backup-Verzeichnis zurück."""
@@ -26,6 +36,78 @@ def get_data_backup_dir(hass):
     return backup_dir
 
 
+def _scan_files(directory: str, suffix: str = "") -> list[os.DirEntry]:
+    """Reguläre Dateien (ohne .gitkeep/Punktdateien) eines Verzeichnisses per os.scandir.
+
+    Dateityp kommt aus dem Verzeichniseintrag, Größe/mtime aus dem
+    gecachten DirEntry.stat() – kein zusätzlicher stat pro Datei.
+    """
+    with os.scandir(directory) as it:
+        return [
+            entry
+            for entry in it
+            if not entry.name.startswith(".")
+            and entry.name.endswith(suffix)
+            and entry.is_file()
+        ]
+
+
+def _has_files(directory: str, suffix: str = "") -> bool:
+    """Prüft ob das Verzeichnis mindestens eine passende Datei enthält.
+
+    Bricht beim ersten Treffer ab, statt die Liste vollständig aufzubauen.
+    """
+    try:
+        with os.scandir(directory) as it:
+            return any(
+                not entry.name.startswith(".")
+                and entry.name.endswith(suffix)
+                and entry.is_file(follow_symlinks=False)
+                for entry in it
+            )
+    except FileNotFoundError:
+        return False
+
+
+def _fast_copy(src: str, dst: str, st: os.stat_result) -> None:
+    """Kopiert eine Datei per os.sendfile (Kernel-intern, ohne Userspace-Puffer).
+
+    Nutzt den bereits per scandir ermittelten stat des Quellfiles und
+    übernimmt Rechte und Zeitstempel wie shutil.copy2.
+    """
+    if not hasattr(os, "sendfile"):
+        shutil.copy2(src, dst)
+        return
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            # Schleife bis EOF, falls die Datei seit dem stat gewachsen ist
+            count = max(st.st_size, 1 << 16)
+            offset = 0
+            while sent := os.sendfile(dst_fd, src_fd, offset, count):
+                offset += sent
+            os.fchmod(dst_fd, st.st_mode & 0o7777)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _clear_dir(directory: str) -> None:
+    """Löscht alle regulären Dateien (außer Punktdateien) eines Backup-Verzeichnisses.
+
+    Der Dateityp kommt aus dem Verzeichniseintrag, Symlinks werden nicht verfolgt.
+    """
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_file(follow_symlinks=False):
+                os.unlink(entry.path)
+
+
 def restore_env_from_backup(hass) -> bool:
     """Stellt env/ und data/ aus dem Backup wieder her.
 
@@ -35,30 +117,18 @@ def restore_env_from_backup(hass) -> bool:
     restored = False
 
     # --- env/ wiederherstellen ---
-    env_dir = os.path.join(os.path.dirname(__file__), "app", "env")
+    env_dir = ENV_DIR
     backup_dir = get_backup_dir(hass)
 
     if not os.path.exists(env_dir):
         os.makedirs(env_dir, exist_ok=True)
 
-    env_files = [
-        f
-        for f in os.listdir(env_dir)
-        if os.path.isfile(os.path.join(env_dir, f)) and f != ".gitkeep"
-    ]
-
-    if not env_files and os.path.exists(backup_dir):
-        backup_files = [
-            f
-            for f in os.listdir(backup_dir)
-            if os.path.isfile(os.path.join(backup_dir, f)) and f != ".gitkeep"
-        ]
+    if not _has_files(env_dir) and os.path.exists(backup_dir):
+        backup_files = _scan_files(backup_dir)
         if backup_files:
             try:
-                for filename in backup_files:
-                    src = os.path.join(backup_dir, filename)
-                    dst = os.path.join(env_dir, filename)
-                    shutil.copy2(src, dst)
+                for entry in backup_files:
+                    shutil.copy2(entry.path, os.path.join(env_dir, entry.name))
                 _LOGGER.info(
                     "env/ Dateien aus Backup wiederhergestellt: %d Dateien",
                     len(backup_files),
@@ -68,32 +138,18 @@ def restore_env_from_backup(hass) -> bool:
                 _LOGGER.error("Fehler beim Wiederherstellen von env/: %s", err)
 
     # --- data/ wiederherstellen ---
-    data_dir = os.path.join(os.path.dirname(__file__), "app", "data")
+    data_dir = _DATA_DIR
     data_backup_dir = get_data_backup_dir(hass)
 
     if not os.path.exists(data_dir):
         os.makedirs(data_dir, exist_ok=True)
 
-    data_files = [
-        f
-        for f in os.listdir(data_dir)
-        if os.path.isfile(os.path.join(data_dir, f))
-        and f.endswith(".json")
-    ]
-
-    if not data_files and os.path.exists(data_backup_dir):
-        backup_data_files = [
-            f
-            for f in os.listdir(data_backup_dir)
-            if os.path.isfile(os.path.join(data_backup_dir, f))
-            and f.endswith(".json")
-        ]
+    if not _has_files(data_dir, ".json") and os.path.exists(data_backup_dir):
+        backup_data_files = _scan_files(data_backup_dir, ".json")
         if backup_data_files:
             try:
-                for filename in backup_data_files:
-                    src = os.path.join(data_backup_dir, filename)
-                    dst = os.path.join(data_dir, filename)
-                    shutil.copy2(src, dst)
+                for entry in backup_data_files:
+                    shutil.copy2(entry.path, os.path.join(data_dir, entry.name))
                 _LOGGER.info(
                     "data/ Dateien aus Backup wiederhergestellt: %d Dateien",
                     len(backup_data_files),
@@ -105,66 +161,85 @@ def restore_env_from_backup(hass) -> bool:
     return restored
 
 
+def _read_sentinel(path: str) -> str | None:
+    """Liest die Signatur des letzten Backups (None wenn keine vorhanden)."""
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return fh.read().strip()
+    except OSError:
+        return None
+
+
+def _backup_dir(src_dir: str, backup_dir: str, suffix: str, label: str) -> int:
+    """Sichert die nicht-leeren Dateien eines Verzeichnisses.
+
+    Haben sich seit dem letzten Backup weder jüngste mtime noch Anzahl
+    der Quelldateien geändert (Signatur im Backup-Verzeichnis), wird
+    nichts kopiert. Gibt die Anzahl gesicherter Dateien zurück.
+    """
+    if not os.path.exists(src_dir):
+        return 0
+
+    sentinel_path = os.path.join(backup_dir, _SENTINEL)
+    try:
+        files = []
+        for entry in _scan_files(src_dir, suffix):
+            st = entry.stat()
+            if st.st_size > 0:
+                files.append((entry, st))
+        if not files:
+            return 0
+
+        # Signatur: jüngste mtime + Anzahl (erkennt auch gelöschte Dateien)
+        signature = f"{max(st.st_mtime_ns for _, st in files)} {len(files)}"
+        if signature == _read_sentinel(sentinel_path):
+            _LOGGER.debug("%s-Backup übersprungen: keine Änderungen", label)
+            return len(files)
+
+        _clear_dir(backup_dir)
+        for entry, st in files:
+            _fast_copy(entry.path, os.path.join(backup_dir, entry.name), st)
+    except OSError as err:
+        _LOGGER.error("Fehler beim %s-Backup: %s", label, err)
+        return 0
+
+    try:
+        with open(sentinel_path, "w", encoding="utf-8") as fh:
+            fh.write(signature)
+    except OSError as err:
+        _LOGGER.debug("Backup-Signatur nicht geschrieben: %s", err)
+    _LOGGER.debug("%s-Backup erstellt: %d Dateien", label, len(files))
+    return len(files)
+
+
+def _backup_env(hass) -> int:
+    """Sichert env/ → .storage/iona_env_backup/"""
+    return _backup_dir(ENV_DIR, get_backup_dir(hass), ".env", "env")
+
+
+def _backup_data(hass) -> int:
+    """Sichert data/ → .storage/iona_data_backup/"""
+    return _backup_dir(_DATA_DIR, get_data_backup_dir(hass), ".json", "data")
+
+
 def backup_env_files(hass) -> bool:
     """Erstellt ein Backup aller .env und .json Datendateien.
 
-    Wird stündlich im Hintergrund aufgerufen.
     Sichert env/ → .storage/iona_env_backup/
     Sichert data/ → .storage/iona_data_backup/
+    Unveränderte Verzeichnisse werden übersprungen.
     """
-    base_dir = os.path.dirname(__file__)
-    env_dir = os.path.join(base_dir, "app", "env")
-    data_dir = os.path.join(base_dir, "app", "data")
-    env_backup_dir = get_backup_dir(hass)
-    data_backup_dir = get_data_backup_dir(hass)
+    total = _backup_env(hass) + _backup_data(hass)
+    return total > 0
 
-    total = 0
 
-    # --- env/ sichern ---
-    if os.path.exists(env_dir):
-        try:
-            for filename in os.listdir(env_backup_dir):
-                if filename == ".gitkeep":
-                    continue
-                filepath = os.path.join(env_backup_dir, filename)
-                if os.path.isfile(filepath):
-                    os.remove(filepath)
-
-            for filename in os.listdir(env_dir):
-                if filename == ".gitkeep":
-                    continue
-                src = os.path.join(env_dir, filename)
-                if (
-                    os.path.isfile(src)
-                    and filename.endswith(".env")
-                    and os.path.getsize(src) > 0
-                ):
-                    shutil.copy2(src, os.path.join(env_backup_dir, filename))
-                    total += 1
-        except OSError as err:
-            _LOGGER.error("Fehler beim env-Backup: %s", err)
-
-    # --- data/ sichern ---
-    if os.path.exists(data_dir):
-        try:
-            for filename in os.listdir(data_backup_dir):
-                filepath = os.path.join(data_backup_dir, filename)
-                if os.path.isfile(filepath):
-                    os.remove(filepath)
-
-            for filename in os.listdir(data_dir):
-                src = os.path.join(data_dir, filename)
-                if (
-                    os.path.isfile(src)
-                    and filename.endswith(".json")
-                    and os.path.getsize(src) > 0
-                ):
-                    shutil.copy2(src, os.path.join(data_backup_dir, filename))
-                    total += 1
-        except OSError as err:
-            _LOGGER.error("Fehler beim data-Backup: %s", err)
-
-    if total > 0:
-        _LOGGER.debug("Backup erstellt: %d Dateien (env + data)", total)
-    return total > 0
+async def async_backup_env_files(hass) -> bool:
+    """Wie backup_env_files, aber env/ und data/ parallel im Executor.
 
+    Wird stündlich und beim Entladen aus dem Event-Loop aufgerufen.
+    """
+    env_total, data_total = await asyncio.gather(
+        hass.async_add_executor_job(_backup_env, hass),
+        hass.async_add_executor_job(_backup_data, hass),
+    )
+    return env_total + data_total > 0
@@ -7,9 +7,18 @@ damit keine doppelte Logik in verschiedenen Modulen existiert.
 import json
 import os
 import shutil
+import stat
+import tempfile
 import logging
+import time
+from bisect import bisect_left
 from datetime import datetime, timedelta
 
+try:
+    import orjson
+except ImportError:  # orjson kommt mit HA Core; Fallback für Standalone
+    orjson = None
+
 _LOGGER = logging.getLogger(__name__)
 
 # Pfade relativ zu diesem Modul
@@ -27,6 +36,12 @@ WEB_TOKEN_ENV = "WebToken.env"
 # Legacy-Dateiname (Tippfehler in v1.x)
 _LEGACY_ACCOUNT_ENV = "accound.env"
 
+# Cache für read_env_cached: Pfad → ((st_mtime_ns, st_size), geparstes dict)
+_ENV_CACHE: dict[str, tuple[tuple[int, int], dict]] = {}
+
+# Cache für get_max_datenlage_stunden: ((st_mtime_ns, st_size), sortierte Epochen)
+_BRUTTO_CACHE: tuple[tuple[int, int], list[float]] | None = None
+
 
 def get_env_path(filename: str) -> str:
     """Gibt den absoluten Pfad zu einer .env Datei zurück."""
@@ -50,63 +65,175 @@ def migrate_env_files() -> None:
             _LOGGER.error("Migration fehlgeschlagen: %s", err)
 
 
-def read_env_file(filename: str) -> dict:
-    """Liest eine .env Datei und gibt ein dict zurück.
+def _parse_env_file(filename: str) -> dict | None:
+    """Liest und parst eine .env Datei (None bei Lesefehler).
 
     Ignoriert Kommentare (#) und leere Zeilen.
     Entfernt umschließende Anführungszeichen von Werten.
     """
-    env: dict[str, str] = {}
-    filepath = get_env_path(filename)
     try:
-        with open(filepath, "r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line or line.startswith("#") or "=" not in line:
-                    continue
-                key, value = line.split("=", 1)
-                env[key.strip()] = value.strip().strip('"')
+        with open(get_env_path(filename), "r", encoding="utf-8") as fh:
+            lines = fh.read().splitlines()
     except FileNotFoundError:
-        pass
+        return None
     except Exception as err:  # noqa: BLE001
         _LOGGER.warning("Fehler beim Lesen von %s: %s", filename, err)
+        return None
+    env = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] == "#":
+            continue
+        # partition trennt in einem Durchlauf; ohne "=" bleibt sep leer
+        key, sep, value = line.partition("=")
+        if sep:
+            env[key.strip()] = value.strip().strip('"')
     return env
 
 
+def read_env_file(filename: str) -> dict:
+    """Liest eine .env Datei und gibt ein (veränderbares) dict zurück.
+
+    Nutzt den Cache von read_env_cached und liefert eine Kopie, damit
+    Aufrufer das Ergebnis gefahrlos verändern können.
+    """
+    return dict(read_env_cached(filename))
+
+
+def atomic_write(filepath: str, data: bytes, mode: int = 0o644) -> None:
+    """Schreibt Bytes atomar: tmp-Datei + fsync + os.replace.
+
+    Die tmp-Datei bekommt per mkstemp einen eindeutigen Namen im selben
+    Verzeichnis, damit parallele Schreiber (Executor-Threads) sich nicht
+    gegenseitig die Datei unter den Füßen ersetzen. Schlägt etwas fehl,
+    wird sie wieder entfernt – die Zieldatei bleibt unverändert.
+    """
+    directory, name = os.path.split(filepath)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f".{name}.", suffix=".tmp")
+    try:
+        try:
+            os.fchmod(fd, mode)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_env_cached(filename: str) -> dict:
+    """Wie read_env_file, aber nur neu geparst wenn sich die Datei geändert hat.
+
+    Gültigkeit über (st_mtime_ns, st_size): im Normalfall bleibt ein
+    einzelnes os.stat übrig. Das zurückgegebene dict wird geteilt und
+    darf vom Aufrufer nicht verändert werden.
+    """
+    filepath = get_env_path(filename)
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        _ENV_CACHE.pop(filepath, None)
+        return {}
+
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _ENV_CACHE.get(filepath)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    env = _parse_env_file(filename)
+    if env is None:
+        _ENV_CACHE.pop(filepath, None)
+        return {}
+    _ENV_CACHE[filepath] = (key, env)
+    return env
+
+
+def peek_env_cached(filename: str) -> dict | None:
+    """Gibt den gecachten Inhalt zurück, wenn er noch aktuell ist – sonst None.
+
+    Macht nur ein os.stat und öffnet nie die Datei; darf daher direkt im
+    Event-Loop aufgerufen werden. Bei None muss read_env_cached im
+    Executor nachladen. Das dict darf nicht verändert werden.
+    """
+    filepath = get_env_path(filename)
+    cached = _ENV_CACHE.get(filepath)
+    if cached is None:
+        return None
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    if cached[0] != (st.st_mtime_ns, st.st_size):
+        return None
+    return cached[1]
+
+
 def write_env_file(filename: str, data: dict) -> bool:
     """Schreibt ein dict als .env Datei.
 
     Erstellt das Verzeichnis, falls es nicht existiert.
-    Werte werden in Anführungszeichen geschrieben.
+    Werte werden in Anführungszeichen geschrieben; der Inhalt geht
+    als ein Bytes-Puffer per atomic_write (Rechte 0600) auf die Platte.
     """
     filepath = get_env_path(filename)
     try:
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        lines = []
-        for key, value in data.items():
-            if value is not None:
-                lines.append(f'{key}="{value}"')
-        with open(filepath, "w", encoding="utf-8") as fh:
-            fh.write("\n".join(lines) + "\n")
-        os.chmod(filepath, 0o600)
+        payload = "".join(
+            f'{key}="{value}"\n' for key, value in data.items() if value is not None
+        )
+        atomic_write(filepath, payload.encode("utf-8"), 0o600)
+        _ENV_CACHE.pop(filepath, None)
         return True
     except Exception as err:  # noqa: BLE001
         _LOGGER.error("Fehler beim Schreiben von %s: %s", filename, err)
         return False
 
 
+def update_env_file(filename: str, updates: dict) -> bool:
+    """Übernimmt die Werte in eine .env Datei (ein Lesen, ein Schreiben).
+
+    Nicht enthaltene Schlüssel bleiben unverändert.
+    """
+    data = read_env_file(filename)
+    data.update(updates)
+    return write_env_file(filename, data)
+
+
 def read_env_value(filename: str, key: str, default: str | None = None) -> str | None:
     """Liest einen einzelnen Wert aus einer .env Datei."""
-    return read_env_file(filename).get(key, default)
+    return read_env_cached(filename).get(key, default)
 
 
 def env_file_exists(filename: str) -> bool:
     """Prüft ob eine .env Datei existiert und nicht leer ist."""
-    filepath = get_env_path(filename)
     try:
-        return os.path.isfile(filepath) and os.path.getsize(filepath) > 0
+        st = os.stat(get_env_path(filename))
     except OSError:
         return False
+    return stat.S_ISREG(st.st_mode) and st.st_size > 0
+
+
+def read_all_snapshot() -> dict:
+    """Liest secrets-n2g.env und account.env in einem Durchgang.
+
+    Für den Setup-Pfad: ein Executor-Job statt je einem pro Prüfung.
+    Nicht vorhandene (oder leere) Dateien liefern ein leeres dict.
+    """
+    secrets_exists = env_file_exists(SECRETS_ENV)
+    account_exists = env_file_exists(ACCOUNT_ENV)
+    return {
+        "secrets_exists": secrets_exists,
+        "secrets": read_env_file(SECRETS_ENV) if secrets_exists else {},
+        "account_exists": account_exists,
+        "account": read_env_file(ACCOUNT_ENV) if account_exists else {},
+    }
 
 
 # ---------- Häufig gebrauchte Konfigurationshelfer ----------
@@ -114,7 +241,7 @@ def env_file_exists(filename: str) -> bool:
 
 def is_vision_enabled() -> bool:
     """Prüft ob der dynamische Tarif (mein Strom Vision) aktiviert ist."""
-    return read_env_value(ACCOUNT_ENV, "vision_tariff", "False").lower() == "true"
+    return read_env_cached(ACCOUNT_ENV).get("vision_tariff", "False").lower() == "true"
 
 
 def is_vision_tools_enabled() -> bool:
@@ -122,6 +249,37 @@ def is_vision_tools_enabled() -> bool:
     return read_env_value(ACCOUNT_ENV, "vision_tools", "False").lower() == "true"
 
 
+def _lade_brutto_epochen() -> list[float]:
+    """Sortierte Epoch-Sekunden aller Brutto-Spotpreise (mtime/size-gecacht).
+
+    Das Ergebnis hängt nur vom Dateiinhalt ab; der Vergleich mit „jetzt"
+    erfolgt beim Aufrufer, damit der Cache über die Zeit gültig bleibt.
+    """
+    global _BRUTTO_CACHE
+    st = os.stat(_BRUTTO_DB)
+    key = (st.st_mtime_ns, st.st_size)
+    if _BRUTTO_CACHE is not None and _BRUTTO_CACHE[0] == key:
+        return _BRUTTO_CACHE[1]
+
+    with open(_BRUTTO_DB, "rb") as fh:
+        raw = fh.read()
+    data = orjson.loads(raw) if orjson else json.loads(raw)
+
+    epochen = []
+    for entry in data.get("_default", {}).values():
+        ts_str = entry.get("timestamp")
+        if ts_str:
+            try:
+                ts = datetime.fromisoformat(ts_str)
+            except (ValueError, TypeError):
+                continue
+            if ts.tzinfo is not None:  # naive Zeitstempel sind nicht vergleichbar
+                epochen.append(ts.timestamp())
+    epochen.sort()
+    _BRUTTO_CACHE = (key, epochen)
+    return epochen
+
+
 def get_max_datenlage_stunden() -> int:
     """Ermittelt die maximale Datenverfügbarkeit der Brutto-Spotpreise in ganzen Stunden.
 
@@ -136,20 +294,8 @@ def get_max_datenlage_stunden() -> int:
         if not os.path.isfile(_BRUTTO_DB):
             return 2  # Keine Daten → Minimum
 
-        with open(_BRUTTO_DB, "r", encoding="utf-8") as fh:
-            data = json.load(fh)
-
-        now = datetime.now().astimezone()
-        future_count = 0
-        for entry in data.get("_default", {}).values():
-            ts_str = entry.get("timestamp")
-            if ts_str:
-                try:
-                    ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                    if ts >= now:
-                        future_count += 1
-                except (ValueError, TypeError):
-                    continue
+        epochen = _lade_brutto_epochen()
+        future_count = len(epochen) - bisect_left(epochen, time.time())
 
         if future_count == 0:
             return 2
@@ -176,9 +322,36 @@ def set_stunden_block(value: int) -> bool:
     """Setzt den Stunden-Block in der account.env."""
     max_daten = get_max_datenlage_stunden()
     max_val = max(1, max_daten - 1)
-    data = read_env_file(ACCOUNT_ENV)
-    data["stunden_block"] = str(max(1, min(max_val, int(value))))
-    return write_env_file(ACCOUNT_ENV, data)
+    return update_env_file(
+        ACCOUNT_ENV, {"stunden_block": str(max(1, min(max_val, int(value))))}
+    )
+
+
+def apply_stunden_block(value: int) -> tuple[int, int | None]:
+    """Setzt den Stunden-Block und hebt die Vorausschau bei Bedarf an.
+
+    Beide Werte landen in einem einzigen Schreibvorgang in der
+    account.env. Gibt den gespeicherten Zeitraum und die neue
+    Vorausschau zurück (None wenn sie unverändert bleibt).
+    """
+    max_daten = get_max_datenlage_stunden()
+    zeitraum = max(1, min(max(1, max_daten - 1), int(value)))
+    updates = {"stunden_block": str(zeitraum)}
+
+    # Vorausschau muss immer > Zeitraum sein
+    try:
+        vorausschau = int(read_env_value(ACCOUNT_ENV, "vorausschau_stunden", "12"))
+    except (ValueError, TypeError):
+        vorausschau = 12
+    vorausschau = max(zeitraum + 1, min(max_daten, vorausschau))
+
+    neue_vorausschau = None
+    if vorausschau <= value:
+        neue_vorausschau = max(zeitraum + 1, min(max_daten, int(value) + 1))
+        updates["vorausschau_stunden"] = str(neue_vorausschau)
+
+    update_env_file(ACCOUNT_ENV, updates)
+    return zeitraum, neue_vorausschau
 
 
 def get_vorausschau_stunden() -> int:
@@ -198,9 +371,10 @@ def set_vorausschau_stunden(value: int) -> bool:
     zeitraum = get_stunden_block()
     max_daten = get_max_datenlage_stunden()
     min_val = zeitraum + 1
-    data = read_env_file(ACCOUNT_ENV)
-    data["vorausschau_stunden"] = str(max(min_val, min(max_daten, int(value))))
-    return write_env_file(ACCOUNT_ENV, data)
+    return update_env_file(
+        ACCOUNT_ENV,
+        {"vorausschau_stunden": str(max(min_val, min(max_daten, int(value))))},
+    )
 
 
 def get_danach_wieder_stunden() -> int:
@@ -222,9 +396,9 @@ def set_danach_wieder_stunden(value: int) -> bool:
 
     0 = Neuberechnung sofort (1 Minute nach Fensterende).
     """
-    data = read_env_file(ACCOUNT_ENV)
-    data["danach_wieder_stunden"] = str(max(0, min(48, int(value))))
-    return write_env_file(ACCOUNT_ENV, data)
+    return update_env_file(
+        ACCOUNT_ENV, {"danach_wieder_stunden": str(max(0, min(48, int(value))))}
+    )
 
 
 def get_nur_nacht() -> bool:
@@ -232,11 +406,17 @@ def get_nur_nacht() -> bool:
     return read_env_value(ACCOUNT_ENV, "nur_nacht", "False").lower() == "true"
 
 
+def get_nur_nacht_cached() -> bool | None:
+    """Wie get_nur_nacht, aber nur aus dem aktuellen Cache (None = nachladen)."""
+    account = peek_env_cached(ACCOUNT_ENV)
+    if account is None:
+        return None
+    return account.get("nur_nacht", "False").lower() == "true"
+
+
 def set_nur_nacht(value: bool) -> bool:
     """Setzt den Nacht-Modus in der account.env."""
-    data = read_env_file(ACCOUNT_ENV)
-    data["nur_nacht"] = str(value)
-    return write_env_file(ACCOUNT_ENV, data)
+    return update_env_file(ACCOUNT_ENV, {"nur_nacht": str(value)})
 
 
 def get_secrets() -> dict:
@@ -1,13 +1,15 @@
 """Number-Entity für konfigurierbare Werte (Stunden-Block für Vision)."""
 
 import logging
+from importlib.util import find_spec
 
 from homeassistant.components.number import NumberEntity, NumberMode
+from homeassistant.helpers.event import async_call_later
 
 from .const import DOMAIN
 from .env_utils import (
+    apply_stunden_block,
     get_stunden_block,
-    set_stunden_block,
     get_vorausschau_stunden,
     set_vorausschau_stunden,
     get_max_datenlage_stunden,
@@ -18,33 +20,80 @@ from .env_utils import (
 
 _LOGGER = logging.getLogger(__name__)
 
-# Vision nur verfügbar wenn Module vorhanden
-try:
-    from .app import get_spot_prices as _  # noqa: F401
-    _VISION_AVAILABLE = True
-except ImportError:
-    _VISION_AVAILABLE = False
+# Wartezeit nach der letzten Regler-Änderung bis zur Vision-Neuberechnung (s)
+_VISION_DEBOUNCE = 0.3
+
+
+def _read_slider_state() -> tuple[int, int, int]:
+    """Liest Zeitraum, Vorausschau und Datenlage in einem Executor-Job."""
+    return get_stunden_block(), get_vorausschau_stunden(), get_max_datenlage_stunden()
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Richte die Number-Plattform ein."""
-    if not _VISION_AVAILABLE:
+    tools_enabled = await hass.async_add_executor_job(is_vision_tools_enabled)
+    if not tools_enabled:
         return
 
-    tools_enabled = await hass.async_add_executor_job(is_vision_tools_enabled)
+    # Vision nur verfügbar wenn Module vorhanden (find_spec importiert nichts;
+    # fehlt das ganze app-Paket, wirft es ModuleNotFoundError)
+    try:
+        if find_spec(f"{__package__}.app.get_spot_prices") is None:
+            return
+    except ModuleNotFoundError:
+        return
 
-    if tools_enabled:
-        async_add_entities(
-            [
-                IonaStundenBlockNumber(hass),
-                IonaVorausschauNumber(hass),
-                IonaDanachWiederNumber(hass),
-            ],
-            update_before_add=True,
-        )
+    async_add_entities(
+        [
+            IonaStundenBlockNumber(hass),
+            IonaVorausschauNumber(hass),
+            IonaDanachWiederNumber(hass),
+        ],
+        update_before_add=True,
+    )
+
+
+class _VisionRecalcMixin:
+    """Entprellt die Vision-Neuberechnung nach Regler-Änderungen.
+
+    Beim Ziehen eines Sliders sendet das Frontend viele Zwischenwerte;
+    der Wert wird jedes Mal sofort gespeichert, gerechnet wird aber nur
+    einmal, _VISION_DEBOUNCE Sekunden nach der letzten Änderung.
+    """
+
+    _cancel_vision = None
+
+    def _schedule_vision(self, force: bool, anlass: str) -> None:
+        """Plant die Neuberechnung (neu), eine ausstehende wird verworfen."""
+        if self._cancel_vision is not None:
+            self._cancel_vision()
+
+        async def _run(_now) -> None:
+            self._cancel_vision = None
+            manager = self._hass.data.get(DOMAIN, {}).get("manager")
+            if manager is None:
+                return
+            try:
+                # force umgeht die Freeze-Logik (eingefrorene Startzeit)
+                if force:
+                    await manager._task_vision_force()
+                else:
+                    await manager._task_vision()
+                _LOGGER.debug("Vision-Neuberechnung nach %s", anlass)
+            except Exception:
+                _LOGGER.warning("Vision-Neuberechnung nach %s fehlgeschlagen", anlass)
+
+        self._cancel_vision = async_call_later(self._hass, _VISION_DEBOUNCE, _run)
 
+    async def async_will_remove_from_hass(self) -> None:
+        """Verwirft eine noch ausstehende Neuberechnung."""
+        if self._cancel_vision is not None:
+            self._cancel_vision()
+            self._cancel_vision = None
+        await super().async_will_remove_from_hass()
 
-class IonaStundenBlockNumber(NumberEntity):
+
+class IonaStundenBlockNumber(_VisionRecalcMixin, NumberEntity):
     """Number-Entity für den Stunden-Block (dynamisch bis Datenlage-1)."""
 
     _attr_has_entity_name = True
@@ -98,17 +147,12 @@ class IonaStundenBlockNumber(NumberEntity):
 
     async def async_set_native_value(self, value: float) -> None:
         """Setze den neuen Wert und passe Vorausschau an falls nötig."""
-        int_value = int(value)
-        await self._hass.async_add_executor_job(set_stunden_block, int_value)
+        int_value, new_vorausschau = await self._hass.async_add_executor_job(
+            apply_stunden_block, int(value)
+        )
         self._attr_native_value = int_value
 
-        # Vorausschau muss immer > Zeitraum sein → ggf. anheben
-        vorausschau = await self._hass.async_add_executor_job(get_vorausschau_stunden)
-        if vorausschau <= int_value:
-            new_vorausschau = int_value + 1
-            await self._hass.async_add_executor_job(
-                set_vorausschau_stunden, new_vorausschau
-            )
+        if new_vorausschau is not None:
             _LOGGER.info(
                 "Vorausschau automatisch auf %dh angehoben (Zeitraum=%dh)",
                 new_vorausschau, int_value,
@@ -117,25 +161,18 @@ class IonaStundenBlockNumber(NumberEntity):
         # Explizite Parameter-Änderung → force, sonst blockiert die
         # Freeze-Logik die Neuberechnung solange die Startzeit in der
         # Zukunft liegt
-        manager = self._hass.data.get(DOMAIN, {}).get("manager")
-        if manager is not None:
-            try:
-                await manager._task_vision_force()
-                _LOGGER.debug("Vision-Neuberechnung nach Regler-Änderung auf %dh", int_value)
-            except Exception:
-                _LOGGER.warning("Vision-Neuberechnung nach Regler-Änderung fehlgeschlagen")
+        self._schedule_vision(True, "Regler-Änderung")
 
     async def async_update(self) -> None:
         """Aktualisiere den Wert und die Datenlage."""
-        self._attr_native_value = await self._hass.async_add_executor_job(
-            get_stunden_block
-        )
-        self._cached_max_datenlage = await self._hass.async_add_executor_job(
-            get_max_datenlage_stunden
+        zeitraum, _, max_daten = await self._hass.async_add_executor_job(
+            _read_slider_state
         )
+        self._attr_native_value = zeitraum
+        self._cached_max_datenlage = max_daten
 
 
-class IonaVorausschauNumber(NumberEntity):
+class IonaVorausschauNumber(_VisionRecalcMixin, NumberEntity):
     """Number-Entity für die Vorausschau (Zeitraum+1 bis Datenlage)."""
 
     _attr_has_entity_name = True
@@ -214,25 +251,15 @@ class IonaVorausschauNumber(NumberEntity):
         self._cached_zeitraum = zeitraum
 
         # Explizite Parameter-Änderung → force (Freeze-Logik umgehen)
-        manager = self._hass.data.get(DOMAIN, {}).get("manager")
-        if manager is not None:
-            try:
-                await manager._task_vision_force()
-                _LOGGER.debug("Vision-Neuberechnung nach Vorausschau-Änderung auf %dh", int_value)
-            except Exception:
-                _LOGGER.warning("Vision-Neuberechnung nach Vorausschau-Änderung fehlgeschlagen")
+        self._schedule_vision(True, "Vorausschau-Änderung")
 
     async def async_update(self) -> None:
         """Aktualisiere den Wert, Zeitraum-Cache und Datenlage."""
-        self._cached_zeitraum = await self._hass.async_add_executor_job(
-            get_stunden_block
-        )
-        self._cached_max_datenlage = await self._hass.async_add_executor_job(
-            get_max_datenlage_stunden
-        )
-        stored = await self._hass.async_add_executor_job(
-            get_vorausschau_stunden
-        )
+        (
+            self._cached_zeitraum,
+            stored,
+            self._cached_max_datenlage,
+        ) = await self._hass.async_add_executor_job(_read_slider_state)
         # Clamp gespeicherten Wert gegen aktuelle Range (Datenlage kann geschrumpft sein)
         min_v = self._cached_zeitraum + 1
         max_v = max(min_v, self._cached_max_datenlage)
@@ -243,7 +270,7 @@ class IonaVorausschauNumber(NumberEntity):
         self._attr_native_value = stored
 
 
-class IonaDanachWiederNumber(NumberEntity):
+class IonaDanachWiederNumber(_VisionRecalcMixin, NumberEntity):
     """Number-Entity für 'danach wieder' – Wartezeit nach dem Zeitfenster.
 
     Legt fest, wie viele Stunden nach Ende des günstigen Zeitfensters
@@ -307,12 +334,7 @@ class IonaDanachWiederNumber(NumberEntity):
 
         # Kein force: die eingefrorene Startzeit bleibt erhalten, aber
         # 'naechste_berechnung' und der Recalc-Timer werden aktualisiert
-        manager = self._hass.data.get(DOMAIN, {}).get("manager")
-        if manager is not None:
-            try:
-                await manager._task_vision()
-            except Exception:
-                _LOGGER.warning("Vision-Aktualisierung nach danach_wieder-Änderung fehlgeschlagen")
+        self._schedule_vision(False, "danach_wieder-Änderung")
 
     async def async_update(self) -> None:
         """Aktualisiere den Wert."""
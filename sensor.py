@@ -7,6 +7,7 @@ mein Strom Vision Preissensoren aus TinyDB JSON-Dateien.
 import os
 import json
 import hashlib
+from importlib.util import find_spec
 from datetime import datetime, timedelta
 from logging import getLogger
 
@@ -17,14 +18,18 @@ from homeassistant.helpers.update_coordinator import (
 )
 from tinydb import TinyDB
 
+try:
+    import orjson
+except ImportError:  # orjson kommt mit HA Core; Fallback für Standalone
+    orjson = None
+
 from .const import INTERVAL_SENSOR_UPDATE
 from .env_utils import is_vision_enabled, is_vision_tools_enabled
 
-# Vision nur verfügbar wenn Module vorhanden
+# Vision nur verfügbar wenn Module vorhanden (find_spec importiert nichts)
 try:
-    from .app import get_spot_prices as _  # noqa: F401
-    _VISION_AVAILABLE = True
-except ImportError:
+    _VISION_AVAILABLE = find_spec(f"{__package__}.app.get_spot_prices") is not None
+except ModuleNotFoundError:  # ganzes app-Paket fehlt
     _VISION_AVAILABLE = False
 
 # Pfade relativ zur Datei
@@ -35,6 +40,25 @@ SPOTPREISE_DB_PATH = os.path.join(BASE_DIR, "app", "data", "spotpreise_brutto_db
 
 SCAN_INTERVAL = timedelta(seconds=INTERVAL_SENSOR_UPDATE)
 
+# Anzeigenamen der Vision-Sensoren; Vorlagen erhalten den stunden_block
+_VISION_NAMES = {"aktueller_preis": "Strompreis für die aktuelle 1/4h"}
+_VISION_NAME_TEMPLATES = {
+    "guenstigste_startzeit": "günstigste Startzeit für {}h",
+    "guenstigste_summe": "Durchschnittskosten für die {}h",
+    "endzeit": "Endzeit für {}h",
+}
+
+# Schlüssel, an denen async_setup_entry ein Vision-Gerät erkennt
+_SETUP_VISION_KEYS = frozenset(
+    {"aktueller_preis", "guenstigste_startzeit", "guenstigste_summe"}
+)
+
+# Lesen ohne atime-Update (spart Metadaten-Schreibzugriffe, z. B. auf SD-Karten)
+_O_NOATIME_RDONLY = os.O_RDONLY | getattr(os, "O_NOATIME", 0)
+
+# Cache für _read_db_generic: Pfad → ((st_mtime_ns, st_size), {device_id: entry})
+_DB_CACHE: dict[str, tuple[tuple[int, int], dict]] = {}
+
 
 # -------------------- Sync Reader (im Executor aufrufen) --------------------
 
@@ -48,67 +72,99 @@ def _read_tinydb_table(path: str) -> dict:
             for entry in table.all():
                 if not isinstance(entry, dict):
                     continue
+                # Documents sind frische Kopien aus dem Storage → direkt ergänzen
                 device_id = entry.get("device_id")
                 if not device_id:
                     doc_id = entry.get("doc_id", len(result) + 1)
-                    device_id = str(doc_id)
-                entry_copy = dict(entry)
-                entry_copy["device_id"] = device_id
-                result[device_id] = entry_copy
+                    device_id = entry["device_id"] = str(doc_id)
+                result[device_id] = entry
             return result
     except Exception:  # noqa: BLE001
         return {}
 
 
+def _index_entries(items) -> dict:
+    """(Schlüssel, Eintrag)-Paare -> {device_id: entry}.
+
+    Die Einträge stammen frisch aus dem Parser und werden ohne Kopie
+    übernommen; nur eine fehlende device_id wird direkt eingetragen.
+    """
+    result = {}
+    for key, entry in items:
+        if not isinstance(entry, dict):
+            continue
+        device_id = entry.get("device_id")
+        if not device_id:
+            device_id = entry["device_id"] = str(key)
+        result[device_id] = entry
+    return result
+
+
 def _read_plain_json(path: str) -> dict:
     """Liest JSON; unterstützt TinyDB-Format {'_default': {'1': {...}}}."""
-    with open(path, "r", encoding="utf-8") as fh:
-        data = json.load(fh)
+    try:
+        fd = os.open(path, _O_NOATIME_RDONLY)
+    except PermissionError:
+        # O_NOATIME ist nur für den Dateieigentümer erlaubt
+        fd = os.open(path, os.O_RDONLY)
+    with os.fdopen(fd, "rb") as fh:
+        raw = fh.read()
+    data = orjson.loads(raw) if orjson else json.loads(raw)
 
     if isinstance(data, dict) and isinstance(data.get("_default"), dict):
-        result = {}
-        for doc_id, entry in data["_default"].items():
-            if not isinstance(entry, dict):
-                continue
-            device_id = entry.get("device_id") or str(doc_id)
-            e = dict(entry)
-            e["device_id"] = device_id
-            result[device_id] = e
-        return result
-
+        return _index_entries(data["_default"].items())
     if isinstance(data, list):
-        result = {}
-        for idx, entry in enumerate(data):
-            if not isinstance(entry, dict):
-                continue
-            device_id = entry.get("device_id") or str(idx)
-            e = dict(entry)
-            e["device_id"] = device_id
-            result[device_id] = e
-        return result
-
+        return _index_entries(enumerate(data))
     if isinstance(data, dict):
-        result = {}
-        for key, entry in data.items():
-            if not isinstance(entry, dict):
-                continue
-            e = dict(entry)
-            e["device_id"] = e.get("device_id") or str(key)
-            result[e["device_id"]] = e
-        return result
-
+        return _index_entries(data.items())
     return {}
 
 
+def _normalize_timestamps(entries: dict) -> None:
+    """Normalisiert die Vision-Zeitstempel einmal beim Einlesen (ISO-Format).
+
+    Nicht parsebare Werte bleiben unverändert; IonaSensor.state gibt den
+    Wert danach nur noch durch.
+    """
+    for entry in entries.values():
+        if IonaSensor.VISION_KEYS.isdisjoint(entry):
+            continue
+        for key in IonaSensor.VISION_TIMESTAMP_KEYS:
+            value = entry.get(key)
+            if value:
+                try:
+                    entry[key] = datetime.fromisoformat(value).isoformat()
+                except (TypeError, ValueError):
+                    pass
+
+
 def _read_db_generic(path: str) -> dict:
-    """TinyDB lesen; bei Fehlern plain JSON als Fallback."""
+    """Plain JSON lesen (ein Parse, keine TinyDB-Documents); TinyDB als Fallback.
+
+    Ergebnis wird über (st_mtime_ns, st_size) gecacht – unveränderte
+    Dateien kosten pro Tick nur ein os.stat. Das zurückgegebene dict
+    wird geteilt und darf nicht verändert werden.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        _DB_CACHE.pop(path, None)
+        return {}
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _DB_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
     try:
-        return _read_tinydb_table(path)
+        result = _read_plain_json(path)
     except Exception:
         try:
-            return _read_plain_json(path)
+            result = _read_tinydb_table(path)
         except Exception:
             return {}
+    _normalize_timestamps(result)
+    _DB_CACHE[path] = (key, result)
+    return result
 
 
 def load_all_db_sync() -> dict:
@@ -150,80 +206,106 @@ async def load_all_db(hass) -> dict:
 class IonaSensor(CoordinatorEntity, Entity):
     """Sensor-Entity für Stromzähler- und Vision-Daten."""
 
-    ENERGY_KEYS = {"Gesamtverbrauch", "Gesamteinspeisung"}
-    POWER_KEYS = {"Momentanleistung"}
-    VISION_PRICE_KEYS = {
+    ENERGY_KEYS = frozenset({"Gesamtverbrauch", "Gesamteinspeisung"})
+    POWER_KEYS = frozenset({"Momentanleistung"})
+    NUMERIC_KEYS = ENERGY_KEYS | POWER_KEYS
+    VISION_PRICE_KEYS = frozenset({
         "aktueller_preis",
-    }
-    VISION_TOOLS_KEYS = {
+    })
+    VISION_TOOLS_KEYS = frozenset({
         "guenstigste_startzeit",
         "guenstigste_summe",
         "endzeit",
-    }
+    })
     VISION_TIMESTAMP_KEYS = ("guenstigste_startzeit", "endzeit")
     VISION_KEYS = VISION_PRICE_KEYS | VISION_TOOLS_KEYS
 
-    def __init__(self, coordinator, device_id: str, sensor_key: str, attributes: dict):
+    def __init__(
+        self,
+        coordinator,
+        device_id: str,
+        sensor_key: str,
+        attributes: dict,
+        meter_id: str | None = None,
+    ):
         super().__init__(coordinator)
         self._device_id = device_id
+        # device_id des Stromzählers (von async_setup_entry einmal ermittelt)
+        self._meter_id = meter_id
         self._sensor_key = sensor_key
         self._initial_attrs = dict(attributes) if attributes else {}
         self._unit_cached = self._initial_attrs.get(f"{sensor_key}_unit")
+        # Vision-Zugehörigkeit und Metadaten ändern sich nicht – einmal als
+        # _attr_* setzen, die Entity-Basisklasse liest sie ohne Property-Aufruf
+        self._is_vision = not self.VISION_KEYS.isdisjoint(self._initial_attrs)
+        self._static_name, self._name_template = self._build_name()
+        self._attr_unique_id = self._build_unique_id()
+        self._attr_device_info = self._build_device_info()
+        self._attr_device_class = self._build_device_class()
+        self._state_class = self._build_state_class()
+
+    def _build_unique_id(self) -> str:
+        if self._is_vision:
+            base = f"vision_{self._device_id}_{self._sensor_key}"
+            prefix = "iona_vision"
+        else:
+            actual_id = self._initial_attrs.get("device_id", self._device_id)
+            base = f"meter_{actual_id}_{self._sensor_key}"
+            prefix = "iona_meter"
 
-    def _is_vision_data(self) -> bool:
-        device = self.coordinator.data.get(self._device_id, {})
-        return any(key in device for key in self.VISION_KEYS)
+        suffix = hashlib.md5(base.encode()).hexdigest()[:8]
+        return f"{prefix}_{self._sensor_key}_{suffix}"
 
-    @property
-    def name(self) -> str:
-        if self._is_vision_data():
-            device = self.coordinator.data.get(self._device_id, {})
-            stunden = device.get("stunden_block", 2)
-            name_map = {
-                "aktueller_preis": "Strompreis für die aktuelle 1/4h",
-                "guenstigste_startzeit": f"günstigste Startzeit für {stunden}h",
-                "guenstigste_summe": f"Durchschnittskosten für die {stunden}h",
-                "endzeit": f"Endzeit für {stunden}h",
+    def _build_device_info(self) -> dict:
+        if self._is_vision and self._sensor_key in self.VISION_TOOLS_KEYS:
+            return {
+                "identifiers": {("iona", "vision_tools")},
+                "name": "mein Strom Vision Tools",
+                "manufacturer": "enviaM",
+                "model": "Vision Optimierung",
             }
+        # aktueller_preis und Meter-Sensoren → Stromzähler-Gerät
+        meter_id = (self._meter_id or self._device_id) if self._is_vision else self._device_id
+        return {
+            "identifiers": {("iona", meter_id)},
+            "name": "mein Stromzähler",
+            "manufacturer": "iona",
+            "model": "Stromzähler",
+        }
+
+    def _build_name(self) -> tuple[str | None, str | None]:
+        """(fester Name, Vorlage mit {} für stunden_block) – genau eins ist gesetzt."""
+        if self._is_vision:
             if self._sensor_key in self.VISION_TOOLS_KEYS:
-                return f"Vision Tools – {name_map.get(self._sensor_key, self._sensor_key)}"
-            return f"Stromzähler {name_map.get(self._sensor_key, self._sensor_key)}"
+                prefix = "Vision Tools – "
+            else:
+                prefix = "Stromzähler "
+            template = _VISION_NAME_TEMPLATES.get(self._sensor_key)
+            if template is not None:
+                return None, prefix + template
+            return prefix + _VISION_NAMES.get(self._sensor_key, self._sensor_key), None
         if self._sensor_key == "source":
-            return "Stromzähler Datenquelle"
-        return f"Stromzähler {self._sensor_key}"
+            return "Stromzähler Datenquelle", None
+        return f"Stromzähler {self._sensor_key}", None
 
     @property
-    def unique_id(self) -> str:
-        if self._is_vision_data():
-            base = f"vision_{self._device_id}_{self._sensor_key}"
-        else:
-            device = self.coordinator.data.get(self._device_id, {})
-            actual_id = device.get("device_id", self._device_id)
-            base = f"meter_{actual_id}_{self._sensor_key}"
-
-        suffix = hashlib.md5(base.encode()).hexdigest()[:8]
-        prefix = "iona_vision" if self._is_vision_data() else "iona_meter"
-        return f"{prefix}_{self._sensor_key}_{suffix}"
+    def name(self) -> str:
+        if self._name_template is None:
+            return self._static_name
+        device = self.coordinator.data.get(self._device_id, {})
+        return self._name_template.format(device.get("stunden_block", 2))
 
     @property
     def state(self):
         device = self.coordinator.data.get(self._device_id, {})
         value = device.get(self._sensor_key)
 
-        if self._sensor_key in self.ENERGY_KEYS | self.POWER_KEYS:
+        if self._sensor_key in self.NUMERIC_KEYS:
             try:
                 return float(value) if value is not None else None
             except (TypeError, ValueError):
                 return None
 
-        if self._is_vision_data() and self._sensor_key in self.VISION_TIMESTAMP_KEYS:
-            if value:
-                try:
-                    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
-                    return dt.isoformat()
-                except Exception:
-                    return value
-
         return value
 
     @property
@@ -239,14 +321,14 @@ class IonaSensor(CoordinatorEntity, Entity):
             attrs["device_class"] = "power"
             attrs["state_class"] = "measurement"
             attrs.setdefault("unit_of_measurement", "W")
-        elif self._is_vision_data() and self._sensor_key in (
+        elif self._is_vision and self._sensor_key in (
             "aktueller_preis",
             "guenstigste_summe",
         ):
             attrs["device_class"] = "monetary"
             attrs["state_class"] = "measurement"
             attrs.setdefault("unit_of_measurement", "€/kWh")
-        elif self._is_vision_data() and self._sensor_key in self.VISION_TIMESTAMP_KEYS:
+        elif self._is_vision and self._sensor_key in self.VISION_TIMESTAMP_KEYS:
             attrs["device_class"] = "timestamp"
 
         if self._sensor_key == "aktueller_preis":
@@ -258,7 +340,7 @@ class IonaSensor(CoordinatorEntity, Entity):
     def unit_of_measurement(self):
         if self._sensor_key in self.POWER_KEYS:
             return "W"
-        if self._is_vision_data() and self._sensor_key in (
+        if self._is_vision and self._sensor_key in (
             "aktueller_preis",
             "guenstigste_summe",
         ):
@@ -266,55 +348,26 @@ class IonaSensor(CoordinatorEntity, Entity):
         device = self.coordinator.data.get(self._device_id, {})
         return device.get(f"{self._sensor_key}_unit", self._unit_cached)
 
-    def _find_meter_device_id(self) -> str:
-        """Findet die device_id des Stromzählers aus den Coordinator-Daten."""
-        for dev_id, dev_data in self.coordinator.data.items():
-            if isinstance(dev_data, dict) and not any(
-                k in dev_data for k in self.VISION_KEYS
-            ):
-                return dev_id
-        return self._device_id
-
-    @property
-    def device_info(self) -> dict:
-        if self._is_vision_data() and self._sensor_key in self.VISION_TOOLS_KEYS:
-            return {
-                "identifiers": {("iona", "vision_tools")},
-                "name": "mein Strom Vision Tools",
-                "manufacturer": "enviaM",
-                "model": "Vision Optimierung",
-            }
-        # aktueller_preis und Meter-Sensoren → Stromzähler-Gerät
-        meter_id = self._find_meter_device_id() if self._is_vision_data() else self._device_id
-        return {
-            "identifiers": {("iona", meter_id)},
-            "name": "mein Stromzähler",
-            "manufacturer": "iona",
-            "model": "Stromzähler",
-        }
-
-    @property
-    def device_class(self):
+    def _build_device_class(self) -> str | None:
         if self._sensor_key in self.ENERGY_KEYS:
             return "energy"
         if self._sensor_key in self.POWER_KEYS:
             return "power"
-        if self._is_vision_data() and self._sensor_key in (
+        if self._is_vision and self._sensor_key in (
             "aktueller_preis",
             "guenstigste_summe",
         ):
             return "monetary"
-        if self._is_vision_data() and self._sensor_key in self.VISION_TIMESTAMP_KEYS:
+        if self._is_vision and self._sensor_key in self.VISION_TIMESTAMP_KEYS:
             return "timestamp"
         return None
 
-    @property
-    def state_class(self):
+    def _build_state_class(self) -> str | None:
         if self._sensor_key in self.ENERGY_KEYS:
             return "total_increasing"
         if self._sensor_key in self.POWER_KEYS:
             return "measurement"
-        if self._is_vision_data() and self._sensor_key in (
+        if self._is_vision and self._sensor_key in (
             "aktueller_preis",
             "guenstigste_summe",
         ):
@@ -322,8 +375,9 @@ class IonaSensor(CoordinatorEntity, Entity):
         return None
 
     @property
-    def entity_category(self):
-        return None
+    def state_class(self):
+        # Plain Entity kennt kein _attr_state_class
+        return self._state_class
 
     @property
     def icon(self):
@@ -341,6 +395,14 @@ class IonaSensor(CoordinatorEntity, Entity):
 # -------------------- Setup --------------------
 
 
+def _find_meter_device_id(data: dict) -> str | None:
+    """Findet die device_id des Stromzählers (erstes Gerät ohne Vision-Schlüssel)."""
+    for dev_id, dev_data in data.items():
+        if isinstance(dev_data, dict) and IonaSensor.VISION_KEYS.isdisjoint(dev_data):
+            return dev_id
+    return None
+
+
 async def async_setup_entry(hass, entry, async_add_entities):
     """Richte die Sensor-Plattform ein."""
     logger = getLogger(__name__)
@@ -361,64 +423,71 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     await coordinator.async_config_entry_first_refresh()
 
+    # Nicht als Sensor angelegte Schlüssel – hängen nur von den Feature-Flags
+    # ab und werden einmal statt pro Schlüssel ausgewertet
+    skip_meter = frozenset({"device_id", "timestamp"})
+    skip_vision = frozenset(
+        {"device_id", "timestamp", "plz", "stunden_block", "naechste_berechnung"}
+    )
+    if not vision_tools_enabled:
+        # Vision Tools Sensoren nur wenn vision_tools aktiviert
+        skip_vision |= IonaSensor.VISION_TOOLS_KEYS
+
+    # Stromzähler-Gerät einmal ermitteln (aktueller_preis wird ihm zugeordnet)
+    meter_id = _find_meter_device_id(coordinator.data)
+
     sensors = []
     for device_id, device_data in coordinator.data.items():
         if not isinstance(device_data, dict):
             continue
 
-        is_vision = any(
-            key in device_data
-            for key in ("aktueller_preis", "guenstigste_startzeit", "guenstigste_summe")
-        )
+        is_vision = not _SETUP_VISION_KEYS.isdisjoint(device_data)
 
         if is_vision and not vision_tariff_enabled:
             continue
 
-        for key in list(device_data.keys()):
-            if key in ("device_id",) or key.endswith("_unit"):
-                continue
-            if is_vision and key in ("timestamp", "plz", "stunden_block", "naechste_berechnung"):
+        skip = skip_vision if is_vision else skip_meter
+        for key in device_data:
+            if key in skip or key.endswith("_unit"):
                 continue
-            if not is_vision and (key == "timestamp" or key.endswith("_timestamp")):
+            if not is_vision and key.endswith("_timestamp"):
                 continue
 
-            # Vision Tools Sensoren nur wenn vision_tools aktiviert
-            if is_vision and key in IonaSensor.VISION_TOOLS_KEYS and not vision_tools_enabled:
-                continue
-
-            sensors.append(IonaSensor(coordinator, device_id, key, device_data))
+            sensors.append(
+                IonaSensor(coordinator, device_id, key, device_data, meter_id)
+            )
 
         # Endzeit-Sensor auch anlegen, wenn das Feld noch nicht in der DB
         # steht (alte vision_db vor dem ersten Durchlauf) – State bleibt
         # unknown bis zur nächsten Berechnung
         if is_vision and vision_tools_enabled and "endzeit" not in device_data:
-            sensors.append(IonaSensor(coordinator, device_id, "endzeit", device_data))
+            sensors.append(
+                IonaSensor(coordinator, device_id, "endzeit", device_data, meter_id)
+            )
 
     async_add_entities(sensors, update_before_add=True)
 
-    # Vision-Sensoren aus Registry entfernen wenn deaktiviert
-    if not vision_tariff_enabled:
-        from homeassistant.helpers import entity_registry as er
-
-        entity_registry = er.async_get(hass)
-        removed = 0
-        for entity_id in list(entity_registry.entities.keys()):
-            if entity_id.startswith("sensor.iona_vision_"):
-                entity_registry.async_remove(entity_id)
-                removed += 1
-        if removed:
-            logger.info("%d Vision-Sensoren entfernt (vision_tariff deaktiviert)", removed)
-
-    # Vision-Tools-Sensoren aus Registry entfernen wenn deaktiviert
-    if not vision_tools_enabled:
+    # Vision- und Vision-Tools-Sensoren aus Registry entfernen wenn deaktiviert
+    # (ein Durchlauf über die Registry für beide Fälle)
+    if not vision_tariff_enabled or not vision_tools_enabled:
         from homeassistant.helpers import entity_registry as er
 
         entity_registry = er.async_get(hass)
-        removed = 0
-        for entity_id in list(entity_registry.entities.keys()):
-            ent = entity_registry.entities.get(entity_id)
-            if ent and ent.unique_id and ("guenstigste_startzeit" in ent.unique_id or "guenstigste_summe" in ent.unique_id or "endzeit" in ent.unique_id):
-                entity_registry.async_remove(entity_id)
-                removed += 1
-        if removed:
-            logger.info("%d Vision-Tools-Sensoren entfernt (vision_tools deaktiviert)", removed)
+        vision_ids = []
+        tools_ids = []
+        for entity_id, ent in entity_registry.entities.items():
+            if not vision_tariff_enabled and entity_id.startswith("sensor.iona_vision_"):
+                vision_ids.append(entity_id)
+            elif not vision_tools_enabled and ent.unique_id and (
+                "guenstigste_startzeit" in ent.unique_id
+                or "guenstigste_summe" in ent.unique_id
+                or "endzeit" in ent.unique_id
+            ):
+                tools_ids.append(entity_id)
+
+        for entity_id in vision_ids + tools_ids:
+            entity_registry.async_remove(entity_id)
+        if vision_ids:
+            logger.info("%d Vision-Sensoren entfernt (vision_tariff deaktiviert)", len(vision_ids))
+        if tools_ids:
+            logger.info("%d Vision-Tools-Sensoren entfernt (vision_tools deaktiviert)", len(tools_ids))
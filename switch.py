@@ -1,19 +1,24 @@
 """Switch-Entity für iona-ha (Nacht-Modus Toggle)."""
 
 import logging
+from importlib.util import find_spec
 
 from homeassistant.components.switch import SwitchEntity
 
 from .const import DOMAIN
-from .env_utils import get_nur_nacht, set_nur_nacht, is_vision_tools_enabled
+from .env_utils import (
+    get_nur_nacht,
+    get_nur_nacht_cached,
+    set_nur_nacht,
+    is_vision_tools_enabled,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-# Vision nur verfügbar wenn Module vorhanden
+# Vision nur verfügbar wenn Module vorhanden (find_spec importiert nichts)
 try:
-    from .app import get_spot_prices as _  # noqa: F401
-    _VISION_AVAILABLE = True
-except ImportError:
+    _VISION_AVAILABLE = find_spec(f"{__package__}.app.get_spot_prices") is not None
+except ModuleNotFoundError:  # ganzes app-Paket fehlt
     _VISION_AVAILABLE = False
 
 
@@ -36,6 +41,7 @@ class IonaNachtModusSwitch(SwitchEntity):
     def __init__(self, hass):
         self._hass = hass
         self._attr_is_on = False
+        self._manager = None
 
     @property
     def name(self) -> str:
@@ -60,32 +66,37 @@ class IonaNachtModusSwitch(SwitchEntity):
 
     async def async_turn_on(self, **kwargs) -> None:
         """Nacht-Modus aktivieren."""
-        await self._hass.async_add_executor_job(set_nur_nacht, True)
-        self._attr_is_on = True
-
-        # Explizite Parameter-Änderung → force (Freeze-Logik umgehen)
-        manager = self._hass.data.get(DOMAIN, {}).get("manager")
-        if manager is not None:
-            try:
-                await manager._task_vision_force()
-                _LOGGER.debug("Vision-Neuberechnung: Nacht-Modus AN")
-            except Exception:
-                _LOGGER.warning("Vision-Neuberechnung nach Nacht-Modus fehlgeschlagen")
+        await self._async_set_nur_nacht(True)
 
     async def async_turn_off(self, **kwargs) -> None:
         """Nacht-Modus deaktivieren."""
-        await self._hass.async_add_executor_job(set_nur_nacht, False)
-        self._attr_is_on = False
+        await self._async_set_nur_nacht(False)
+
+    async def _async_set_nur_nacht(self, value: bool) -> None:
+        """Speichert den Nacht-Modus und stößt die Vision-Neuberechnung an."""
+        await self._hass.async_add_executor_job(set_nur_nacht, value)
+        self._attr_is_on = value
+
+        # Manager einmal nachschlagen; er lebt so lange wie diese Entity
+        if self._manager is None:
+            self._manager = self._hass.data.get(DOMAIN, {}).get("manager")
+        if self._manager is None:
+            return
 
         # Explizite Parameter-Änderung → force (Freeze-Logik umgehen)
-        manager = self._hass.data.get(DOMAIN, {}).get("manager")
-        if manager is not None:
-            try:
-                await manager._task_vision_force()
-                _LOGGER.debug("Vision-Neuberechnung: Nacht-Modus AUS")
-            except Exception:
-                _LOGGER.warning("Vision-Neuberechnung nach Nacht-Modus fehlgeschlagen")
+        try:
+            await self._manager._task_vision_force()
+            _LOGGER.debug("Vision-Neuberechnung: Nacht-Modus %s", "AN" if value else "AUS")
+        except Exception:
+            _LOGGER.warning("Vision-Neuberechnung nach Nacht-Modus fehlgeschlagen")
 
     async def async_update(self) -> None:
-        """Aktualisiere den Wert aus der Datei."""
-        self._attr_is_on = await self._hass.async_add_executor_job(get_nur_nacht)
+        """Aktualisiere den Wert aus der Datei.
+
+        Ist account.env unverändert, reicht der Cache (nur stat, kein
+        Executor-Wechsel); sonst wird im Executor neu gelesen.
+        """
+        nur_nacht = get_nur_nacht_cached()
+        if nur_nacht is None:
+            nur_nacht = await self._hass.async_add_executor_job(get_nur_nacht)
+        self._attr_is_on = nur_nacht